@@ -8,17 +8,30 @@ Usage examples:
   python queue_sim.py --k 1 --mean-ms 10 --rho 0.8  --dist const     --n 200000
   python queue_sim.py --k 1 --mean-ms 10 --rho 0.8  --dist mixture   --n 200000 --mix-p 0.01 --slow-mult 100 
   python queue_sim.py --k 4 --mean-ms 10 --rho 0.85 --dist lognormal --n 300000 --lognorm-sigma 1.2  --csv out.csv
+  python queue_sim.py --k 4 --mean-ms 10 --rho 0.7  --dist mixture   --hedge-ms 20
+  python queue_sim.py --k 4 --mean-ms 10 --rho 0.7  --dist mixture   --timeout-ms 50 --max-retries 2 --backoff-ms 10
+  python queue_sim.py --k 1 --mean-ms 10 --rho 0.5  --dist lognormal --shards 100 --quorum 95
+  python queue_sim.py --k 4 --mean-ms 10 --rho 0.95 --dist mixture   --max-queue 20 --codel --adaptive-lifo
+  python queue_sim.py --k 1 --mean-ms 10 --rho 0.9  --dist mixture   --timeseries ts.csv --window-ms 1000
+  python queue_sim.py --k 1 --mean-ms 10 --rho 0.8  --dist pareto    --pareto-alpha 2.2
+  python queue_sim.py --k 4 --rho 0.8 --sched preemptive --class read:0.9:0:exp:mean_ms=2 --class write:0.1:1:lognormal:mean_ms=50
+  python queue_sim.py --k 4 --dist lognormal --rate-profile 0:200,3600:200,4200:800,7200:800 --horizon-s 10800 --slo-ms 100
 """
 
 from __future__ import annotations
 
 import argparse
+import bisect
 import csv
+import heapq
 import math
 import random
 import statistics
-from dataclasses import dataclass
-from typing import Callable, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 # --------------------------
@@ -57,14 +70,407 @@ def inservice_retry_sampler(
 
     return sample
 
+
+@dataclass(frozen=True)
+class DistParams:
+    """Shape parameters for every distribution; each one only reads its own."""
+    lognorm_sigma: float = 1.0
+    mix_p: float = 0.01
+    slow_mult: float = 100.0
+    pareto_alpha: float = 2.5
+    weibull_shape: float = 0.5
+    gamma_shape: float = 0.5
+    h2_cs2: float = 4.0
+
+
+ScalarSampler = Callable[[], float]
+BatchSampler = Callable[[Tuple[int, ...]], np.ndarray]
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """
+    A registered service-time distribution, always parameterized so E[S] = mean_s.
+
+    scalar(mean_s, rng, params)   -> sample() for the per-request simulators
+    batch(mean_s, np_rng, params) -> sample(shape) for the vectorized ones
+    cs2(params)                   -> theoretical C_s^2
+    fit_cs2(params, cs2)          -> params with the shape chosen to hit cs2,
+                                     or None if C_s^2 is fixed (const, exp)
+    """
+    name: str
+    help: str
+    scalar: Callable[[float, random.Random, DistParams], ScalarSampler]
+    batch: Callable[[float, np.random.Generator, DistParams], BatchSampler]
+    cs2: Callable[[DistParams], float]
+    fit_cs2: Optional[Callable[[DistParams, float], DistParams]] = None
+
+
+DISTRIBUTIONS: Dict[str, Distribution] = {}
+
+
+def register_distribution(d: Distribution) -> Distribution:
+    if d.name in DISTRIBUTIONS:
+        raise ValueError(f"distribution already registered: {d.name}")
+    DISTRIBUTIONS[d.name] = d
+    return d
+
+
+def get_distribution(name: str) -> Distribution:
+    try:
+        return DISTRIBUTIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown dist: {name}") from None
+
+
+def _bisect_log(f: Callable[[float], float], target: float, lo: float, hi: float) -> float:
+    """Solve f(x) = target for x in [lo, hi], f monotone, bisecting in log space."""
+    rising = f(hi) > f(lo)
+    for _ in range(200):
+        mid = math.sqrt(lo * hi)
+        if (f(mid) < target) == rising:
+            lo = mid
+        else:
+            hi = mid
+    return math.sqrt(lo * hi)
+
+
+# const: S = E[S]
+
+def _const_scalar(mean_s: float, rng: random.Random, p: DistParams) -> ScalarSampler:
+    def sample() -> float:
+        return mean_s
+    return sample
+
+
+def _const_batch(mean_s: float, np_rng: np.random.Generator, p: DistParams) -> BatchSampler:
+    def sample(shape: Tuple[int, ...]) -> np.ndarray:
+        return np.full(shape, mean_s)
+    return sample
+
+
+register_distribution(Distribution(
+    name="const",
+    help="deterministic, C_s^2 = 0",
+    scalar=_const_scalar,
+    batch=_const_batch,
+    cs2=lambda p: 0.0,
+))
+
+
+# exp: Exponential with mean mean_s
+
+def _exp_scalar(mean_s: float, rng: random.Random, p: DistParams) -> ScalarSampler:
+    expovariate = rng.expovariate
+    rate = 1.0 / mean_s
+
+    def sample() -> float:
+        return expovariate(rate)
+    return sample
+
+
+def _exp_batch(mean_s: float, np_rng: np.random.Generator, p: DistParams) -> BatchSampler:
+    def sample(shape: Tuple[int, ...]) -> np.ndarray:
+        return np_rng.exponential(mean_s, shape)
+    return sample
+
+
+register_distribution(Distribution(
+    name="exp",
+    help="exponential, C_s^2 = 1",
+    scalar=_exp_scalar,
+    batch=_exp_batch,
+    cs2=lambda p: 1.0,
+))
+
+
+# lognormal: if X ~ LogNormal(mu, sigma), then E[X] = exp(mu + 0.5*sigma^2).
+# Choose mu such that E[X]=mean_s.
+
+def _lognormal_mu_sigma(mean_s: float, p: DistParams) -> Tuple[float, float]:
+    sigma = float(p.lognorm_sigma)
+    if sigma <= 0:
+        raise ValueError("--lognorm-sigma must be > 0")
+    return math.log(mean_s) - 0.5 * sigma * sigma, sigma
+
+
+def _lognormal_scalar(mean_s: float, rng: random.Random, p: DistParams) -> ScalarSampler:
+    mu, sigma = _lognormal_mu_sigma(mean_s, p)
+    lognormvariate = rng.lognormvariate
+
+    def sample() -> float:
+        return lognormvariate(mu, sigma)
+    return sample
+
+
+def _lognormal_batch(mean_s: float, np_rng: np.random.Generator, p: DistParams) -> BatchSampler:
+    mu, sigma = _lognormal_mu_sigma(mean_s, p)
+
+    def sample(shape: Tuple[int, ...]) -> np.ndarray:
+        return np_rng.lognormal(mu, sigma, shape)
+    return sample
+
+
+def _lognormal_fit(p: DistParams, cs2: float) -> DistParams:
+    if cs2 <= 0:
+        raise ValueError("lognormal needs C_s^2 > 0")
+    return replace(p, lognorm_sigma=lognorm_sigma_from_cs2(cs2))
+
+
+register_distribution(Distribution(
+    name="lognormal",
+    help="lognormal, C_s^2 = exp(sigma^2) - 1 (--lognorm-sigma)",
+    scalar=_lognormal_scalar,
+    batch=_lognormal_batch,
+    cs2=lambda p: math.expm1(p.lognorm_sigma ** 2),
+    fit_cs2=_lognormal_fit,
+))
+
+
+# mixture: rare-slow, with prob mix_p, slow = fast * slow_mult.
+# Choose fast so that E[S]=mean_s:
+# mean = (1-p)*fast + p*(fast*slow_mult) = fast * [(1-p) + p*slow_mult]
+
+def _mixture_fast_slow(mean_s: float, p: DistParams) -> Tuple[float, float, float]:
+    mix_p = float(p.mix_p)
+    if not (0.0 < mix_p < 1.0):
+        raise ValueError("--mix-p must be in (0,1)")
+    if p.slow_mult <= 1.0:
+        raise ValueError("--slow-mult must be > 1")
+    fast = mean_s / ((1.0 - mix_p) + mix_p * p.slow_mult)
+    return mix_p, fast, fast * p.slow_mult
+
+
+def _mixture_scalar(mean_s: float, rng: random.Random, p: DistParams) -> ScalarSampler:
+    mix_p, fast, slow = _mixture_fast_slow(mean_s, p)
+    random_ = rng.random
+
+    def sample() -> float:
+        return slow if (random_() < mix_p) else fast
+    return sample
+
+
+def _mixture_batch(mean_s: float, np_rng: np.random.Generator, p: DistParams) -> BatchSampler:
+    mix_p, fast, slow = _mixture_fast_slow(mean_s, p)
+
+    def sample(shape: Tuple[int, ...]) -> np.ndarray:
+        return np.where(np_rng.random(shape) < mix_p, slow, fast)
+    return sample
+
+
+def _mixture_cs2(mix_p: float, slow_mult: float) -> float:
+    d = (1.0 - mix_p) + mix_p * slow_mult
+    return ((1.0 - mix_p) + mix_p * slow_mult * slow_mult) / (d * d) - 1.0
+
+
+def _mixture_fit(p: DistParams, cs2: float) -> DistParams:
+    # C_s^2 rises with slow_mult towards (1-p)/p, so mix_p bounds what we can hit.
+    limit = (1.0 - p.mix_p) / p.mix_p
+    if not (0.0 < cs2 < limit):
+        raise ValueError(f"mixture with --mix-p {p.mix_p} needs 0 < C_s^2 < {limit:.3f}")
+    m = _bisect_log(lambda m: _mixture_cs2(p.mix_p, m), cs2, 1.0 + 1e-9, 1e12)
+    return replace(p, slow_mult=m)
+
+
+register_distribution(Distribution(
+    name="mixture",
+    help="rare-slow two-point mixture (--mix-p, --slow-mult)",
+    scalar=_mixture_scalar,
+    batch=_mixture_batch,
+    cs2=lambda p: _mixture_cs2(p.mix_p, p.slow_mult),
+    fit_cs2=_mixture_fit,
+))
+
+
+# pareto: classic Pareto(x_m, alpha), E[X] = alpha*x_m/(alpha-1), so x_m = mean*(alpha-1)/alpha.
+# C_s^2 = 1/(alpha*(alpha-2)) for alpha > 2, infinite for 1 < alpha <= 2.
+
+def _pareto_xm_alpha(mean_s: float, p: DistParams) -> Tuple[float, float]:
+    alpha = float(p.pareto_alpha)
+    if alpha <= 1.0:
+        raise ValueError("--pareto-alpha must be > 1 for a finite mean")
+    return mean_s * (alpha - 1.0) / alpha, alpha
+
+
+def _pareto_scalar(mean_s: float, rng: random.Random, p: DistParams) -> ScalarSampler:
+    xm, alpha = _pareto_xm_alpha(mean_s, p)
+    paretovariate = rng.paretovariate
+
+    def sample() -> float:
+        return xm * paretovariate(alpha)
+    return sample
+
+
+def _pareto_batch(mean_s: float, np_rng: np.random.Generator, p: DistParams) -> BatchSampler:
+    xm, alpha = _pareto_xm_alpha(mean_s, p)
+
+    def sample(shape: Tuple[int, ...]) -> np.ndarray:
+        # NumPy's pareto is Lomax (Pareto II); shift by 1 for the classic one.
+        return xm * (np_rng.pareto(alpha, shape) + 1.0)
+    return sample
+
+
+def _pareto_fit(p: DistParams, cs2: float) -> DistParams:
+    if cs2 <= 0:
+        raise ValueError("pareto needs C_s^2 > 0")
+    return replace(p, pareto_alpha=1.0 + math.sqrt(1.0 + 1.0 / cs2))
+
+
+register_distribution(Distribution(
+    name="pareto",
+    help="Pareto, power-law tail (--pareto-alpha; infinite variance for alpha <= 2)",
+    scalar=_pareto_scalar,
+    batch=_pareto_batch,
+    cs2=lambda p: 1.0 / (p.pareto_alpha * (p.pareto_alpha - 2.0)) if p.pareto_alpha > 2.0 else float("inf"),
+    fit_cs2=_pareto_fit,
+))
+
+
+# weibull: E[X] = scale * Gamma(1 + 1/k), C_s^2 = Gamma(1 + 2/k) / Gamma(1 + 1/k)^2 - 1.
+# Shape k < 1 gives a heavier-than-exponential (stretched exponential) tail.
+
+def _weibull_cs2(k: float) -> float:
+    return math.exp(math.lgamma(1.0 + 2.0 / k) - 2.0 * math.lgamma(1.0 + 1.0 / k)) - 1.0
+
+
+def _weibull_scale_shape(mean_s: float, p: DistParams) -> Tuple[float, float]:
+    k = float(p.weibull_shape)
+    if k <= 0:
+        raise ValueError("--weibull-shape must be > 0")
+    return mean_s / math.gamma(1.0 + 1.0 / k), k
+
+
+def _weibull_scalar(mean_s: float, rng: random.Random, p: DistParams) -> ScalarSampler:
+    scale, k = _weibull_scale_shape(mean_s, p)
+    weibullvariate = rng.weibullvariate
+
+    def sample() -> float:
+        return weibullvariate(scale, k)
+    return sample
+
+
+def _weibull_batch(mean_s: float, np_rng: np.random.Generator, p: DistParams) -> BatchSampler:
+    scale, k = _weibull_scale_shape(mean_s, p)
+
+    def sample(shape: Tuple[int, ...]) -> np.ndarray:
+        return scale * np_rng.weibull(k, shape)
+    return sample
+
+
+def _weibull_fit(p: DistParams, cs2: float) -> DistParams:
+    if cs2 <= 0:
+        raise ValueError("weibull needs C_s^2 > 0")
+    return replace(p, weibull_shape=_bisect_log(_weibull_cs2, cs2, 0.02, 1e4))
+
+
+register_distribution(Distribution(
+    name="weibull",
+    help="Weibull (--weibull-shape; < 1 is heavier-tailed than exp)",
+    scalar=_weibull_scalar,
+    batch=_weibull_batch,
+    cs2=lambda p: _weibull_cs2(p.weibull_shape),
+    fit_cs2=_weibull_fit,
+))
+
+
+# gamma: shape a, scale mean/a; C_s^2 = 1/a.
+
+def _gamma_shape_scale(mean_s: float, p: DistParams) -> Tuple[float, float]:
+    a = float(p.gamma_shape)
+    if a <= 0:
+        raise ValueError("--gamma-shape must be > 0")
+    return a, mean_s / a
+
+
+def _gamma_scalar(mean_s: float, rng: random.Random, p: DistParams) -> ScalarSampler:
+    a, scale = _gamma_shape_scale(mean_s, p)
+    gammavariate = rng.gammavariate
+
+    def sample() -> float:
+        return gammavariate(a, scale)
+    return sample
+
+
+def _gamma_batch(mean_s: float, np_rng: np.random.Generator, p: DistParams) -> BatchSampler:
+    a, scale = _gamma_shape_scale(mean_s, p)
+
+    def sample(shape: Tuple[int, ...]) -> np.ndarray:
+        return np_rng.gamma(a, scale, shape)
+    return sample
+
+
+def _gamma_fit(p: DistParams, cs2: float) -> DistParams:
+    if cs2 <= 0:
+        raise ValueError("gamma needs C_s^2 > 0")
+    return replace(p, gamma_shape=1.0 / cs2)
+
+
+register_distribution(Distribution(
+    name="gamma",
+    help="gamma, C_s^2 = 1/shape (--gamma-shape)",
+    scalar=_gamma_scalar,
+    batch=_gamma_batch,
+    cs2=lambda p: 1.0 / p.gamma_shape,
+    fit_cs2=_gamma_fit,
+))
+
+
+# h2: two-phase hyperexponential with balanced means (p1/mu1 = p2/mu2), the
+# standard way to hit a given C_s^2 >= 1 with exponential phases:
+#   p1 = (1 + sqrt((c2-1)/(c2+1))) / 2,  phase i has mean mean_s / (2*p_i)
+
+def _h2_phases(mean_s: float, p: DistParams) -> Tuple[float, float, float]:
+    c2 = float(p.h2_cs2)
+    if c2 < 1.0:
+        raise ValueError("--h2-cs2 must be >= 1")
+    p1 = 0.5 * (1.0 + math.sqrt((c2 - 1.0) / (c2 + 1.0)))
+    return p1, mean_s / (2.0 * p1), mean_s / (2.0 * (1.0 - p1))
+
+
+def _h2_scalar(mean_s: float, rng: random.Random, p: DistParams) -> ScalarSampler:
+    p1, m1, m2 = _h2_phases(mean_s, p)
+    rate1, rate2 = 1.0 / m1, 1.0 / m2
+    random_ = rng.random
+    expovariate = rng.expovariate
+
+    def sample() -> float:
+        return expovariate(rate1 if random_() < p1 else rate2)
+    return sample
+
+
+def _h2_batch(mean_s: float, np_rng: np.random.Generator, p: DistParams) -> BatchSampler:
+    p1, m1, m2 = _h2_phases(mean_s, p)
+
+    def sample(shape: Tuple[int, ...]) -> np.ndarray:
+        # Unit exponentials scaled by the phase mean: two draws per sample,
+        # one uniform for the phase and one exponential.
+        means = np.where(np_rng.random(shape) < p1, m1, m2)
+        return np_rng.standard_exponential(shape) * means
+    return sample
+
+
+def _h2_fit(p: DistParams, cs2: float) -> DistParams:
+    if cs2 < 1.0:
+        raise ValueError("h2 needs C_s^2 >= 1")
+    return replace(p, h2_cs2=cs2)
+
+
+register_distribution(Distribution(
+    name="h2",
+    help="balanced-means hyperexponential, C_s^2 >= 1 (--h2-cs2)",
+    scalar=_h2_scalar,
+    batch=_h2_batch,
+    cs2=lambda p: p.h2_cs2,
+    fit_cs2=_h2_fit,
+))
+
+
 def service_sampler(
     dist: str,
     mean_s: float,
     rng: random.Random,
-    lognorm_sigma: float,
-    mix_p: float,
-    slow_mult: float,
-) -> Tuple[Callable[[], float], float]:
+    params: DistParams,
+) -> Tuple[ScalarSampler, float]:
     """
     Returns (sampler(), expected_mean) in seconds.
 
@@ -72,48 +478,62 @@ def service_sampler(
     """
     if mean_s <= 0:
         raise ValueError("mean_s must be > 0")
+    return get_distribution(dist).scalar(mean_s, rng, params), mean_s
+
+
+def batch_service_sampler(
+    dist: str,
+    mean_s: float,
+    np_rng: np.random.Generator,
+    params: DistParams,
+) -> BatchSampler:
+    """
+    Vectorized counterpart of service_sampler: returns sample(shape) -> array in seconds.
+
+    Same parameterization, so E[S] = mean_s for every distribution.
+    """
+    if mean_s <= 0:
+        raise ValueError("mean_s must be > 0")
+    return get_distribution(dist).batch(mean_s, np_rng, params)
+
+
+def add_distribution_args(ap: argparse.ArgumentParser, default: str, lognorm_sigma: float) -> None:
+    """--dist and every registered distribution's shape flags."""
+    d = DistParams()
+    ap.add_argument("--dist", type=str, default=default, choices=list(DISTRIBUTIONS),
+                    help="; ".join(f"{x.name}: {x.help}" for x in DISTRIBUTIONS.values()))
+
+    # lognormal
+    ap.add_argument("--lognorm-sigma", type=float, default=lognorm_sigma,
+                    help="sigma for lognormal (higher => heavier tail)")
+
+    # mixture
+    ap.add_argument("--mix-p", type=float, default=d.mix_p,
+                    help="probability of slow request in mixture")
+    ap.add_argument("--slow-mult", type=float, default=d.slow_mult,
+                    help="slow service-time multiplier in mixture")
+
+    # pareto / weibull / gamma / h2
+    ap.add_argument("--pareto-alpha", type=float, default=d.pareto_alpha,
+                    help="Pareto tail index (lower => heavier tail)")
+    ap.add_argument("--weibull-shape", type=float, default=d.weibull_shape,
+                    help="Weibull shape (lower => heavier tail)")
+    ap.add_argument("--gamma-shape", type=float, default=d.gamma_shape,
+                    help="gamma shape (C_s^2 = 1/shape)")
+    ap.add_argument("--h2-cs2", type=float, default=d.h2_cs2,
+                    help="target C_s^2 for the hyperexponential")
 
-    if dist == "const":
-        def sample() -> float:
-            return mean_s
-        return sample, mean_s
-
-    if dist == "exp":
-        # Exponential with mean mean_s
-        def sample() -> float:
-            return rng.expovariate(1.0 / mean_s)
-        return sample, mean_s
-
-    if dist == "lognormal":
-        # If X ~ LogNormal(mu, sigma), then E[X] = exp(mu + 0.5*sigma^2)
-        # Choose mu such that E[X]=mean_s.
-        sigma = float(lognorm_sigma)
-        if sigma <= 0:
-            raise ValueError("--lognorm-sigma must be > 0")
-        mu = math.log(mean_s) - 0.5 * sigma * sigma
-
-        def sample() -> float:
-            return rng.lognormvariate(mu, sigma)
-        return sample, mean_s
-
-    if dist == "mixture":
-        # Rare-slow mixture: with prob mix_p, slow = fast * slow_mult.
-        # Choose fast so that E[S]=mean_s:
-        # mean = (1-p)*fast + p*(fast*slow_mult) = fast * [(1-p) + p*slow_mult]
-        p = float(mix_p)
-        if not (0.0 < p < 1.0):
-            raise ValueError("--mix-p must be in (0,1)")
-        if slow_mult <= 1.0:
-            raise ValueError("--slow-mult must be > 1")
-        denom = (1.0 - p) + p * slow_mult
-        fast = mean_s / denom
-        slow = fast * slow_mult
-
-        def sample() -> float:
-            return slow if (rng.random() < p) else fast
-        return sample, mean_s
-
-    raise ValueError(f"Unknown dist: {dist}")
+
+def dist_params_from_args(args: argparse.Namespace) -> DistParams:
+    return DistParams(
+        lognorm_sigma=args.lognorm_sigma,
+        mix_p=args.mix_p,
+        slow_mult=args.slow_mult,
+        pareto_alpha=args.pareto_alpha,
+        weibull_shape=args.weibull_shape,
+        gamma_shape=args.gamma_shape,
+        h2_cs2=args.h2_cs2,
+    )
 
 
 # --------------------------
@@ -135,7 +555,17 @@ class Summary:
     mean_latency_ms: float
     mean_queue_ms: float
     mean_service_ms: float
-    cs2: float
+    cs2: float  # observed
+    target_cs2: float = float("nan")  # theoretical, from Distribution.cs2
+    # Only filled in for event-driven runs (see simulate_events).
+    utilization: float = float("nan")
+    wasted_frac: float = float("nan")
+    attempts_per_req: float = float("nan")
+    failed: int = 0
+    reject_rate: float = float("nan")  # fraction of attempts refused at admission
+    drop_rate: float = float("nan")  # fraction of attempts shed from the queue
+    goodput: float = float("nan")  # completed requests per second
+    request_class: str = ""  # set for per-class results (see simulate_multiclass)
 
 def percentile(sorted_values: List[float], p: float) -> float:
     """p in [0,100]. Returns linear-interpolated percentile."""
@@ -205,111 +635,1572 @@ def simulate_mgk(
     return latencies, qdelays, stimes
 
 
-def summarize(
-    lat_s: List[float],
-    q_s: List[float],
-    s_s: List[float],
-    *,
-    k: int,
-    n: int,
-    mean_s: float,
-    lam: float,
-    rho: float,
-    dist: str,
-) -> Summary:
-    lat_sorted = sorted(lat_s)
-    p50 = percentile(lat_sorted, 50) * 1000.0
-    p95 = percentile(lat_sorted, 95) * 1000.0
-    p99 = percentile(lat_sorted, 99) * 1000.0
-    p999 = percentile(lat_sorted, 99.9) * 1000.0
-    mean_lat = statistics.fmean(lat_s) * 1000.0
-    mean_q = statistics.fmean(q_s) * 1000.0
-    mean_serv = statistics.fmean(s_s) * 1000.0
+# --------------------------
+# Windowed metrics
+# --------------------------
 
-    # Service-time variability: C_s^2 = Var(S) / E[S]^2
-    # Use population variance since we have a full simulated sample.
-    if len(s_s) >= 2:
-        var_serv = statistics.pvariance(s_s)
-    else:
-        var_serv = 0.0
-    
-    mean_serv_s = statistics.fmean(s_s) if s_s else 0.0
-    cs2 = (var_serv / (mean_serv_s * mean_serv_s)) if mean_serv_s > 0 else float("nan")
+# Log-bucketed sketch with 1% relative error: bucket i covers (gamma^(i-1), gamma^i].
+_SKETCH_ALPHA = 0.01
+_SKETCH_GAMMA = (1.0 + _SKETCH_ALPHA) / (1.0 - _SKETCH_ALPHA)
+_SKETCH_INV_LOG_GAMMA = 1.0 / math.log(_SKETCH_GAMMA)
+_SKETCH_MIN = 1e-9  # 1 ns; anything smaller shares the lowest bucket
 
-    return Summary(
-        k=k,
-        n=n,
-        mean_s=mean_s,
-        lam=lam,
-        rho=rho,
-        dist=dist,
-        p50_ms=p50,
-        p95_ms=p95,
-        p99_ms=p99,
-        p999_ms=p999,
-        mean_latency_ms=mean_lat,
-        mean_queue_ms=mean_q,
-        mean_service_ms=mean_serv,
-        cs2=cs2,
-    )
 
+class LatencySketch:
+    """
+    Streaming latency histogram with bounded relative error (DDSketch-style).
 
-def print_summary(s: Summary) -> None:
-    print("\n=== M/G/k discrete-event simulation ===")
-    print(f"k={s.k}  n={s.n:,}")
-    print(f"dist={s.dist}")
-    print(f"E[S] target={s.mean_s*1000:.3f} ms  observed_mean_S={s.mean_service_ms:.3f} ms")
-    print(f"lambda={s.lam:.3f} req/s")
-    print(f"rho≈lambda*E[S]/k = {s.rho:.3f}")
-    print("")
-    print("Service-time variability:")
-    print(f"  C_s^2 = Var(S) / E[S]^2 = {s.cs2:.6f}")
-    print("")
-    print("Latency percentiles (ms):")
-    print(f"  p50   {s.p50_ms:.3f}")
-    print(f"  p95   {s.p95_ms:.3f}")
-    print(f"  p99   {s.p99_ms:.3f}")
-    print(f"  p99.9 {s.p999_ms:.3f}")
-    print("")
-    print(f"Mean latency:      {s.mean_latency_ms:.3f} ms")
-    print(f"Mean queue delay:  {s.mean_queue_ms:.3f} ms")
-    print("")
+    Memory is one counter per occupied log bucket, so it does not grow with
+    the number of samples: a sample range of 1 us..1000 s needs < 1100 buckets.
+    """
+    __slots__ = ("counts", "n")
 
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.n = 0
 
-def write_csv(path: str, lat_s: List[float], q_s: List[float], s_s: List[float]) -> None:
-    with open(path, "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["latency_ms", "queue_ms", "service_ms"])
-        for lat, q, s in zip(lat_s, q_s, s_s):
-            w.writerow([lat * 1000.0, q * 1000.0, s * 1000.0])
+    def add(self, x: float) -> None:
+        i = math.ceil(math.log(x if x > _SKETCH_MIN else _SKETCH_MIN) * _SKETCH_INV_LOG_GAMMA)
+        self.counts[i] = self.counts.get(i, 0) + 1
+        self.n += 1
 
+    def quantile(self, q: float) -> float:
+        """q in [0,1]. Returns nan for an empty sketch."""
+        if self.n == 0:
+            return float("nan")
+        rank = q * (self.n - 1)
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen > rank:
+                return 2.0 * _SKETCH_GAMMA ** i / (_SKETCH_GAMMA + 1.0)
+        return float("nan")  # unreachable
 
-# --------------------------
-# CLI
-# --------------------------
 
-def main() -> None:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--k", type=int, default=1, help="number of servers/workers")
-    ap.add_argument("--n", type=int, default=200_000, help="number of requests to simulate")
-    ap.add_argument("--seed", type=int, default=7)
+@dataclass
+class WindowStats:
+    start_s: float
+    end_s: float
+    completed: int
+    throughput: float  # completed requests per second
+    utilization: float  # time-averaged busy servers / time-averaged servers
+    mean_queue_len: float  # time-averaged queue length
+    p50_ms: float
+    p99_ms: float
+    mean_servers: float  # time-averaged server count (k, unless autoscaling)
 
-    # Parameterize by rho because it's what you want to talk about in the blog
-    ap.add_argument("--rho", type=float, default=0.8, help="target utilization rho in (0,1)")
-    ap.add_argument("--mean-ms", type=float, default=10.0, help="target mean service time E[S] in ms")
 
-    ap.add_argument("--dist", type=str, default="const",
-                    choices=["const", "exp", "lognormal", "mixture"])
+class _Window:
+    __slots__ = ("start", "end", "completed", "busy_area", "queue_area", "servers_area", "sketch")
 
-    # lognormal
-    ap.add_argument("--lognorm-sigma", type=float, default=1.0,
-                    help="sigma for lognormal (higher => heavier tail)")
+    def __init__(self, start: float, end: float) -> None:
+        self.start = start
+        self.end = end
+        self.completed = 0
+        self.busy_area = 0.0  # integral of busy servers over time
+        self.queue_area = 0.0  # integral of queue length over time
+        self.servers_area = 0.0  # integral of server count over time
+        self.sketch = LatencySketch()
 
-    # mixture
-    ap.add_argument("--mix-p", type=float, default=0.01,
-                    help="probability of slow request in mixture")
-    ap.add_argument("--slow-mult", type=float, default=100.0,
-                    help="slow service-time multiplier in mixture")
+
+class WindowedMetrics:
+    """
+    Online per-window time series for a simulation clock that only moves forward.
+
+    The simulator reports piecewise-constant levels (queue length, busy servers
+    and, if it changes, the server count) whenever they may have changed, and every
+    completion. Each window keeps its own LatencySketch; closed windows are passed
+    to on_window and then dropped, so memory stays bounded for any horizon.
+    """
+
+    def __init__(
+        self,
+        window_s: float,
+        k: int,
+        on_window: Optional[Callable[[WindowStats], None]] = None,
+    ) -> None:
+        if window_s <= 0:
+            raise ValueError("window_s must be > 0")
+        self.window_s = window_s
+        self.k = k
+        self.on_window = on_window
+        self._cur = _Window(0.0, window_s)
+        self._t = 0.0  # time up to which levels have been integrated
+        self._qlen = 0
+        self._busy = 0
+        self._servers = k
+
+    def _advance(self, t: float) -> None:
+        cur = self._cur
+        while t >= cur.end:
+            dt = cur.end - self._t
+            cur.busy_area += self._busy * dt
+            cur.queue_area += self._qlen * dt
+            cur.servers_area += self._servers * dt
+            self._t = cur.end
+            self._emit(cur)
+            cur = self._cur = _Window(cur.end, cur.end + self.window_s)
+        if t > self._t:
+            dt = t - self._t
+            cur.busy_area += self._busy * dt
+            cur.queue_area += self._qlen * dt
+            cur.servers_area += self._servers * dt
+            self._t = t
+
+    def _emit(self, w: _Window) -> None:
+        if self.on_window is not None:
+            self.on_window(self._stats(w))
+
+    def _stats(self, w: _Window) -> WindowStats:
+        span = w.end - w.start
+        return WindowStats(
+            start_s=w.start,
+            end_s=w.end,
+            completed=w.completed,
+            throughput=w.completed / span,
+            utilization=w.busy_area / w.servers_area if w.servers_area > 0 else float("nan"),
+            mean_queue_len=w.queue_area / span,
+            p50_ms=w.sketch.quantile(0.50) * 1000.0,
+            p99_ms=w.sketch.quantile(0.99) * 1000.0,
+            mean_servers=w.servers_area / span,
+        )
+
+    def level(self, t: float, qlen: int, busy: int, servers: Optional[int] = None) -> None:
+        """Queue length, busy servers and (optionally) server count from time t onwards."""
+        self._advance(t)
+        self._qlen = qlen
+        self._busy = busy
+        if servers is not None:
+            self._servers = servers
+
+    def complete(self, t: float, latency: float) -> None:
+        self._advance(t)
+        self._cur.completed += 1
+        self._cur.sketch.add(latency)
+
+    def close(self, t: float) -> None:
+        """Integrate up to t and emit the last, possibly partial, window."""
+        self._advance(t)
+        cur = self._cur
+        if self._t > cur.start:
+            cur.end = self._t
+            self._emit(cur)
+        self._cur = _Window(cur.end, cur.end + self.window_s)
+
+
+# --------------------------
+# Event-driven simulator
+# --------------------------
+
+# Attempt states
+_QUEUED = 0
+_RUNNING = 1
+_DONE = 2
+_CANCELLED = 3
+_ABANDONED = 4  # client gave up on it, but the server still does the work
+
+# Event kinds
+_EV_ARRIVAL = 0
+_EV_DEPART = 1
+_EV_HEDGE = 2
+_EV_TIMEOUT = 3
+_EV_RETRY = 4
+
+
+class _Request:
+    __slots__ = ("arrival", "done", "attempts", "outstanding", "tries")
+
+    def __init__(self, arrival: float) -> None:
+        self.arrival = arrival
+        self.done = False
+        self.attempts: List[_Attempt] = []
+        self.outstanding = 0
+        self.tries = 0
+
+
+class _Attempt:
+    __slots__ = ("req", "sent", "start", "service", "state", "server")
+
+    def __init__(self, req: _Request, sent: float, service: float) -> None:
+        self.req = req
+        self.sent = sent
+        self.start = -1.0
+        self.service = service
+        self.state = _QUEUED
+        self.server = -1
+
+
+@dataclass
+class EventStats:
+    """Work accounting for an event-driven run (times in seconds)."""
+    horizon_s: float
+    busy_s: float
+    wasted_s: float
+    attempts: int
+    hedges: int
+    retries: int
+    timeouts: int
+    cancelled: int
+    failed: int
+    rejected: int  # refused at admission (max_queue / max_inflight)
+    shed: int  # dropped from the queue by codel
+    completed: int
+
+
+def simulate_events(
+    k: int,
+    n: int,
+    lam: float,
+    sample_service: Callable[[], float],
+    rng: random.Random,
+    *,
+    timeout_s: Optional[float] = None,
+    max_retries: int = 0,
+    backoff_s: float = 0.0,
+    hedge_s: Optional[float] = None,
+    cancel_on_timeout: bool = True,
+    max_queue: Optional[int] = None,
+    max_inflight: Optional[int] = None,
+    codel: bool = False,
+    adaptive_lifo: bool = False,
+    codel_target_s: float = 0.005,
+    codel_interval_s: float = 0.1,
+    metrics: Optional[WindowedMetrics] = None,
+) -> Tuple[List[float], List[float], List[float], EventStats]:
+    """
+    Simulate M/G/k with FCFS discipline as a discrete-event simulation.
+
+    Unlike simulate_mgk, attempts can leave the system before they finish,
+    which is what timeouts, retries, hedging and load shedding need.
+
+    Returns: (latencies, queue_delays, service_times, stats) where the lists
+    only cover requests that completed; queue delay is latency minus the
+    service time of the winning attempt.
+
+    Model:
+      arrivals are a Poisson process of n requests; each request sends an attempt
+      hedge_s:     if the request is still pending hedge_s after arrival, send one
+                   duplicate; the first attempt to finish wins, the loser is cancelled
+      timeout_s:   the client gives up on an attempt timeout_s after sending it;
+                   with cancel_on_timeout the server drops it, otherwise the server
+                   still runs it to completion (pure wasted work)
+      max_retries: once every attempt of a request has failed (timed out, rejected
+                   or shed), retry after backoff_s * 2^(retry-1); when retries run
+                   out the request fails
+    Every attempt samples a fresh service time. Work spent on attempts that did
+    not win is counted in stats.wasted_s and still counts as busy time.
+
+    Admission control and shedding (all O(1) per attempt):
+      max_queue:     reject an attempt on arrival if this many are already queued
+      max_inflight:  reject an attempt on arrival if this many are queued or running
+      codel:         queue-delay based shedding, as used for RPC queues: if the queue
+                     has not been empty for codel_interval_s it is standing, and an
+                     attempt that waited longer than codel_target_s is dropped at
+                     dequeue; otherwise the limit is codel_interval_s
+      adaptive_lifo: while the queue is standing, serve newest first, so fresh
+                     requests (whose clients are still waiting) get through
+
+    If metrics is given, it is fed queue length and busy servers after every
+    event and every completion, and closed at the end of the run.
+    """
+    if k <= 0:
+        raise ValueError("k must be >= 1")
+    if n <= 0:
+        raise ValueError("n must be >= 1")
+    if lam <= 0:
+        raise ValueError("lam must be > 0")
+    if timeout_s is not None and timeout_s <= 0:
+        raise ValueError("timeout_s must be > 0")
+    if max_retries < 0:
+        raise ValueError("max_retries must be >= 0")
+    if max_queue is not None and max_queue < 0:
+        raise ValueError("max_queue must be >= 0")
+    if max_inflight is not None and max_inflight <= 0:
+        raise ValueError("max_inflight must be >= 1")
+    if codel_target_s <= 0 or codel_interval_s <= 0:
+        raise ValueError("codel_target_s and codel_interval_s must be > 0")
+    can_fail = (timeout_s is not None or max_queue is not None
+                or max_inflight is not None or codel)
+    if max_retries > 0 and not can_fail:
+        raise ValueError("max_retries requires timeout_s or a shedding option")
+    if backoff_s < 0:
+        raise ValueError("backoff_s must be >= 0")
+    if hedge_s is not None and hedge_s < 0:
+        raise ValueError("hedge_s must be >= 0")
+
+    heap: List[Tuple[float, int, int, object]] = []
+    push = heapq.heappush
+    pop = heapq.heappop
+    seq = 0  # tie-breaker so the heap never compares payloads
+
+    free: List[int] = list(range(k))  # idle server ids
+    queue: deque = deque()  # attempts; cancelled ones are skipped lazily
+    qlen = 0  # live (not cancelled) attempts in queue
+    last_empty = 0.0  # last time the queue was empty
+
+    latencies: List[float] = []
+    qdelays: List[float] = []
+    stimes: List[float] = []
+
+    busy = 0.0
+    wasted = 0.0
+    attempts = hedges = retries = timeouts = cancelled = failed = 0
+    rejected = shed = 0
+    now = 0.0
+    horizon = 0.0  # last time a server finished or dropped work
+
+    def start(a: _Attempt, srv: int, t: float) -> None:
+        nonlocal seq
+        if a.state == _QUEUED:
+            a.state = _RUNNING
+        a.start = t
+        a.server = srv
+        seq += 1
+        push(heap, (t + a.service, seq, _EV_DEPART, a))
+
+    def attempt_failed(req: _Request, t: float) -> None:
+        nonlocal seq, retries, failed
+        req.outstanding -= 1
+        if req.outstanding > 0:
+            return
+        if req.tries < max_retries:
+            req.tries += 1
+            retries += 1
+            seq += 1
+            delay = backoff_s * (2.0 ** (req.tries - 1))
+            push(heap, (t + delay, seq, _EV_RETRY, req))
+        else:
+            req.done = True
+            failed += 1
+
+    def release(srv: int, t: float) -> None:
+        nonlocal qlen, last_empty, shed
+        while qlen:
+            standing = t - last_empty > codel_interval_s
+            a = queue.pop() if (adaptive_lifo and standing) else queue.popleft()
+            if a.state == _CANCELLED:
+                continue
+            qlen -= 1
+            if qlen == 0:
+                last_empty = t
+            if codel and t - a.sent > (codel_target_s if standing else codel_interval_s):
+                shed += 1
+                abandoned = a.state == _ABANDONED
+                a.state = _CANCELLED
+                if not abandoned:
+                    attempt_failed(a.req, t)
+                continue
+            start(a, srv, t)
+            return
+        queue.clear()  # drop lazily cancelled leftovers
+        free.append(srv)
+
+    def send(req: _Request, t: float) -> None:
+        nonlocal seq, attempts, rejected, qlen, last_empty
+        a = _Attempt(req, t, sample_service())
+        attempts += 1
+        req.attempts.append(a)
+        req.outstanding += 1
+        if ((max_inflight is not None and (k - len(free)) + qlen >= max_inflight)
+                or (max_queue is not None and not free and qlen >= max_queue)):
+            rejected += 1
+            a.state = _CANCELLED
+            attempt_failed(req, t)
+            return
+        if timeout_s is not None:
+            seq += 1
+            push(heap, (t + timeout_s, seq, _EV_TIMEOUT, a))
+        if free:
+            start(a, free.pop(), t)
+        else:
+            if qlen == 0:
+                last_empty = t
+            queue.append(a)
+            qlen += 1
+
+    def cancel(a: _Attempt, t: float) -> None:
+        nonlocal busy, wasted, cancelled, horizon, qlen, last_empty
+        cancelled += 1
+        if a.start >= 0.0:
+            spent = t - a.start
+            busy += spent
+            wasted += spent
+            horizon = t
+            a.state = _CANCELLED
+            release(a.server, t)
+        else:
+            a.state = _CANCELLED
+            qlen -= 1
+            if qlen == 0:
+                last_empty = t
+
+    push(heap, (rng.expovariate(lam), 0, _EV_ARRIVAL, None))
+    arrived = 0
+
+    while heap:
+        now, _, kind, obj = pop(heap)
+
+        if kind == _EV_DEPART:
+            a = obj
+            if a.state == _CANCELLED:
+                continue  # stale: freed when it was cancelled
+            busy += a.service
+            horizon = now
+            req = a.req
+            if a.state == _RUNNING and not req.done:
+                a.state = _DONE
+                req.done = True
+                req.outstanding -= 1
+                lat = now - req.arrival
+                latencies.append(lat)
+                qdelays.append(lat - a.service)
+                stimes.append(a.service)
+                if metrics is not None:
+                    metrics.complete(now, lat)
+                for other in req.attempts:
+                    if other.state == _QUEUED or other.state == _RUNNING:
+                        cancel(other, now)
+            else:
+                a.state = _DONE
+                wasted += a.service
+            release(a.server, now)
+
+        elif kind == _EV_ARRIVAL:
+            arrived += 1
+            req = _Request(now)
+            send(req, now)
+            if hedge_s is not None:
+                seq += 1
+                push(heap, (now + hedge_s, seq, _EV_HEDGE, req))
+            if arrived < n:
+                seq += 1
+                push(heap, (now + rng.expovariate(lam), seq, _EV_ARRIVAL, None))
+
+        elif kind == _EV_TIMEOUT:
+            a = obj
+            if a.state != _QUEUED and a.state != _RUNNING:
+                continue
+            timeouts += 1
+            if cancel_on_timeout:
+                cancel(a, now)
+            else:
+                a.state = _ABANDONED
+            attempt_failed(a.req, now)
+
+        elif kind == _EV_HEDGE:
+            req = obj
+            if not req.done and req.outstanding > 0:
+                hedges += 1
+                send(req, now)
+
+        else:  # _EV_RETRY
+            req = obj
+            if not req.done:
+                send(req, now)
+
+        if metrics is not None:
+            metrics.level(now, qlen, k - len(free))
+
+    if metrics is not None:
+        metrics.close(horizon)
+
+    stats = EventStats(
+        horizon_s=horizon,
+        busy_s=busy,
+        wasted_s=wasted,
+        attempts=attempts,
+        hedges=hedges,
+        retries=retries,
+        timeouts=timeouts,
+        cancelled=cancelled,
+        failed=failed,
+        rejected=rejected,
+        shed=shed,
+        completed=len(latencies),
+    )
+    return latencies, qdelays, stimes, stats
+
+
+def summarize(
+    lat_s: List[float],
+    q_s: List[float],
+    s_s: List[float],
+    *,
+    k: int,
+    n: int,
+    mean_s: float,
+    lam: float,
+    rho: float,
+    dist: str,
+    stats: Optional[EventStats] = None,
+    request_class: str = "",
+    target_cs2: float = float("nan"),
+) -> Summary:
+    nan = float("nan")
+    lat_sorted = sorted(lat_s)
+    p50 = percentile(lat_sorted, 50) * 1000.0
+    p95 = percentile(lat_sorted, 95) * 1000.0
+    p99 = percentile(lat_sorted, 99) * 1000.0
+    p999 = percentile(lat_sorted, 99.9) * 1000.0
+    # Event-driven runs can fail every request, so guard the means.
+    mean_lat = statistics.fmean(lat_s) * 1000.0 if lat_s else nan
+    mean_q = statistics.fmean(q_s) * 1000.0 if q_s else nan
+    mean_serv = statistics.fmean(s_s) * 1000.0 if s_s else nan
+
+    # Service-time variability: C_s^2 = Var(S) / E[S]^2
+    # Use population variance since we have a full simulated sample.
+    if len(s_s) >= 2:
+        var_serv = statistics.pvariance(s_s)
+    else:
+        var_serv = 0.0
+    
+    mean_serv_s = statistics.fmean(s_s) if s_s else 0.0
+    cs2 = (var_serv / (mean_serv_s * mean_serv_s)) if mean_serv_s > 0 else float("nan")
+
+    # Busy time includes cancelled and abandoned work, so this is the
+    # utilization the servers actually saw, not the offered rho.
+    utilization = nan
+    wasted_frac = nan
+    attempts_per_req = nan
+    failed = 0
+    reject_rate = nan
+    drop_rate = nan
+    goodput = nan
+    if stats is not None:
+        if stats.horizon_s > 0:
+            utilization = stats.busy_s / (k * stats.horizon_s)
+        if stats.busy_s > 0:
+            wasted_frac = stats.wasted_s / stats.busy_s
+        attempts_per_req = stats.attempts / n
+        failed = stats.failed
+        reject_rate = stats.rejected / stats.attempts
+        drop_rate = stats.shed / stats.attempts
+        if stats.horizon_s > 0:
+            goodput = stats.completed / stats.horizon_s
+
+    return Summary(
+        k=k,
+        n=n,
+        mean_s=mean_s,
+        lam=lam,
+        rho=rho,
+        dist=dist,
+        p50_ms=p50,
+        p95_ms=p95,
+        p99_ms=p99,
+        p999_ms=p999,
+        mean_latency_ms=mean_lat,
+        mean_queue_ms=mean_q,
+        mean_service_ms=mean_serv,
+        cs2=cs2,
+        target_cs2=target_cs2,
+        utilization=utilization,
+        wasted_frac=wasted_frac,
+        attempts_per_req=attempts_per_req,
+        failed=failed,
+        reject_rate=reject_rate,
+        drop_rate=drop_rate,
+        goodput=goodput,
+        request_class=request_class,
+    )
+
+
+def print_summary(s: Summary) -> None:
+    print("\n=== M/G/k discrete-event simulation ===")
+    print(f"k={s.k}  n={s.n:,}")
+    print(f"dist={s.dist}")
+    print(f"E[S] target={s.mean_s*1000:.3f} ms  observed_mean_S={s.mean_service_ms:.3f} ms")
+    print(f"lambda={s.lam:.3f} req/s")
+    print(f"rho≈lambda*E[S]/k = {s.rho:.3f}")
+    print("")
+    print("Service-time variability:")
+    print(f"  C_s^2 = Var(S) / E[S]^2 = {s.cs2:.6f}")
+    if not math.isnan(s.target_cs2):
+        print(f"  C_s^2 target (theory)  = {s.target_cs2:.6f}")
+    print("")
+    print("Latency percentiles (ms):")
+    print(f"  p50   {s.p50_ms:.3f}")
+    print(f"  p95   {s.p95_ms:.3f}")
+    print(f"  p99   {s.p99_ms:.3f}")
+    print(f"  p99.9 {s.p999_ms:.3f}")
+    print("")
+    print(f"Mean latency:      {s.mean_latency_ms:.3f} ms")
+    print(f"Mean queue delay:  {s.mean_queue_ms:.3f} ms")
+    print("")
+    if not math.isnan(s.utilization):
+        print("Work accounting:")
+        print(f"  observed utilization  {s.utilization:.3f}")
+        print(f"  wasted work fraction  {s.wasted_frac:.3f}")
+        print(f"  attempts per request  {s.attempts_per_req:.3f}")
+        print(f"  failed requests       {s.failed:,}")
+        print(f"  reject rate           {s.reject_rate:.4f}")
+        print(f"  drop rate (shed)      {s.drop_rate:.4f}")
+        print(f"  goodput               {s.goodput:.3f} req/s")
+        print("")
+
+
+def write_csv(path: str, lat_s: List[float], q_s: List[float], s_s: List[float]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["latency_ms", "queue_ms", "service_ms"])
+        for lat, q, s in zip(lat_s, q_s, s_s):
+            w.writerow([lat * 1000.0, q * 1000.0, s * 1000.0])
+
+
+TIMESERIES_HEADER = [
+    "start_s", "end_s", "completed", "throughput_rps", "utilization", "mean_queue_len", "p50_ms", "p99_ms",
+    "mean_servers",
+]
+
+
+def timeseries_row(w: WindowStats) -> List[float]:
+    return [
+        w.start_s, w.end_s, w.completed, w.throughput, w.utilization, w.mean_queue_len, w.p50_ms, w.p99_ms,
+        w.mean_servers,
+    ]
+
+
+class TimeseriesWriter:
+    """WindowedMetrics sink: streams windows to CSV and remembers the worst ones."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._f = open(path, "w", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow(TIMESERIES_HEADER)
+        self.count = 0
+        self.worst_p99: Optional[WindowStats] = None
+        self.longest_queue: Optional[WindowStats] = None
+
+    def __call__(self, w: WindowStats) -> None:
+        self._w.writerow(timeseries_row(w))
+        self.count += 1
+        if not math.isnan(w.p99_ms) and (self.worst_p99 is None or w.p99_ms > self.worst_p99.p99_ms):
+            self.worst_p99 = w
+        if self.longest_queue is None or w.mean_queue_len > self.longest_queue.mean_queue_len:
+            self.longest_queue = w
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def print_timeseries(ts: TimeseriesWriter, window_s: float) -> None:
+    print(f"Time series: {ts.count:,} windows of {window_s:.3f} s")
+    for label, w in (("worst p99 window", ts.worst_p99), ("longest queue", ts.longest_queue)):
+        if w is not None:
+            print(f"  {label:<18} t={w.start_s:.1f}s  p99={w.p99_ms:.3f} ms  "
+                  f"queue={w.mean_queue_len:.2f}  util={w.utilization:.3f}")
+    print("")
+
+
+# --------------------------
+# Fan-out (scatter-gather)
+# --------------------------
+
+@dataclass
+class FanoutSummary:
+    k: int
+    n: int
+    shards: int
+    quorum: int  # 0 = a single shard on its own
+    mean_s: float
+    lam: float
+    rho: float
+    dist: str
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    p999_ms: float
+    mean_latency_ms: float
+
+
+def simulate_fanout(
+    k: int,
+    n: int,
+    lam: float,
+    shards: int,
+    sample_batch: Callable[[Tuple[int, ...]], np.ndarray],
+    np_rng: np.random.Generator,
+    quorums: Sequence[int],
+    chunk: int = 8192,
+) -> Tuple[Dict[int, np.ndarray], np.ndarray]:
+    """
+    Simulate a front end fanning every request out to `shards` independent M/G/k
+    backends (FCFS) that all see the same Poisson arrival stream.
+
+    Returns: ({quorum: end_to_end_latencies}, shard0_latencies) in seconds.
+    The end-to-end latency for quorum q is the q-th fastest shard response, so
+    q = shards is wait-for-all.
+
+    Requests are processed in chunks of `chunk` to keep memory at O(shards * chunk):
+      k == 1: Lindley's recursion D_i = max(A_i, D_{i-1}) + S_i unrolls into a
+              cumulative max over the chunk, fully vectorized across shards
+      k > 1:  "next-free server" per request, vectorized across shards
+    Order statistics across shards use np.partition, so N=100 stays cheap.
+    """
+    if k <= 0:
+        raise ValueError("k must be >= 1")
+    if n <= 0:
+        raise ValueError("n must be >= 1")
+    if lam <= 0:
+        raise ValueError("lam must be > 0")
+    if shards <= 0:
+        raise ValueError("shards must be >= 1")
+    for q in quorums:
+        if not (1 <= q <= shards):
+            raise ValueError("quorum must be in [1, shards]")
+
+    out = {q: np.empty(n) for q in quorums}
+    shard0 = np.empty(n)
+    rows = np.arange(shards)
+    free = np.zeros((shards, k))  # time each server becomes free, per shard
+    last_depart = np.zeros(shards)  # k == 1 carry between chunks
+    t = 0.0
+
+    for lo in range(0, n, chunk):
+        c = min(chunk, n - lo)
+        arrivals = t + np.cumsum(np_rng.exponential(1.0 / lam, c))
+        t = float(arrivals[-1])
+        svc = sample_batch((shards, c))
+
+        if k == 1:
+            csum = np.cumsum(svc, axis=1)
+            # D_i = C_i + max(D_prev, max_{j<=i}(A_j - C_{j-1}))
+            slack = np.maximum.accumulate(arrivals - (csum - svc), axis=1)
+            depart = csum + np.maximum(slack, last_depart[:, None])
+            last_depart = depart[:, -1]
+        else:
+            depart = np.empty((shards, c))
+            for j in range(c):
+                i = free.argmin(axis=1)
+                start = np.maximum(free[rows, i], arrivals[j])
+                end = start + svc[:, j]
+                free[rows, i] = end
+                depart[:, j] = end
+
+        lat = depart - arrivals
+        shard0[lo:lo + c] = lat[0]
+        for q in quorums:
+            if q == shards:
+                out[q][lo:lo + c] = lat.max(axis=0)
+            elif q == 1:
+                out[q][lo:lo + c] = lat.min(axis=0)
+            else:
+                out[q][lo:lo + c] = np.partition(lat, q - 1, axis=0)[q - 1]
+
+    return out, shard0
+
+
+def summarize_fanout(
+    lat_s: np.ndarray,
+    *,
+    k: int,
+    n: int,
+    shards: int,
+    quorum: int,
+    mean_s: float,
+    lam: float,
+    rho: float,
+    dist: str,
+) -> FanoutSummary:
+    # np.percentile's default linear method matches percentile() above.
+    p50, p95, p99, p999 = np.percentile(lat_s, [50, 95, 99, 99.9]) * 1000.0
+    return FanoutSummary(
+        k=k,
+        n=n,
+        shards=shards,
+        quorum=quorum,
+        mean_s=mean_s,
+        lam=lam,
+        rho=rho,
+        dist=dist,
+        p50_ms=float(p50),
+        p95_ms=float(p95),
+        p99_ms=float(p99),
+        p999_ms=float(p999),
+        mean_latency_ms=float(lat_s.mean()) * 1000.0,
+    )
+
+
+def print_fanout(summaries: List[FanoutSummary]) -> None:
+    s0 = summaries[0]
+    print("\n=== Fan-out over M/G/k shards ===")
+    print(f"shards={s0.shards}  k={s0.k} per shard  n={s0.n:,}")
+    print(f"dist={s0.dist}")
+    print(f"E[S] target={s0.mean_s*1000:.3f} ms")
+    print(f"lambda={s0.lam:.3f} req/s per shard")
+    print(f"rho≈lambda*E[S]/k = {s0.rho:.3f}")
+    print("")
+    print("Latency percentiles (ms):")
+    print(f"  {'wait for':<14} {'p50':>10} {'p95':>10} {'p99':>10} {'p99.9':>10} {'mean':>10}")
+    for s in summaries:
+        label = "one shard" if s.quorum == 0 else f"{s.quorum} of {s.shards}"
+        print(
+            f"  {label:<14} {s.p50_ms:>10.3f} {s.p95_ms:>10.3f} {s.p99_ms:>10.3f} "
+            f"{s.p999_ms:>10.3f} {s.mean_latency_ms:>10.3f}"
+        )
+    print("")
+
+
+# --------------------------
+# Multi-class scheduling
+# --------------------------
+
+@dataclass
+class RequestClass:
+    name: str
+    share: float  # fraction of arrivals
+    priority: int  # lower is served first by the priority schedulers
+    dist: str
+    mean_s: float
+    sample_service: Callable[[], float]
+
+
+class _Job:
+    __slots__ = ("cls", "arrival", "service", "remaining", "rank", "seq", "start", "server", "gen")
+
+    def __init__(self, cls: int, arrival: float, service: float, rank: float, seq: int) -> None:
+        self.cls = cls
+        self.arrival = arrival
+        self.service = service
+        self.remaining = service
+        self.rank = rank
+        self.seq = seq
+        self.start = -1.0
+        self.server = -1
+        self.gen = 0  # bumped whenever the job stops running; stale events carry an old gen
+
+
+@dataclass(frozen=True)
+class Scheduler:
+    """
+    A queueing discipline: jobs are served in increasing (rank, arrival order).
+
+    rank(cls) is computed once per job from its class, so queue operations are
+    plain heap pushes and pops. A preemptive scheduler lets an arriving job
+    displace the worst-ranked running job (preemptive-resume: no work is lost).
+    """
+    name: str
+    help: str
+    rank: Callable[[RequestClass], float]
+    preemptive: bool = False
+
+
+SCHEDULERS: Dict[str, Scheduler] = {}
+
+
+def register_scheduler(s: Scheduler) -> Scheduler:
+    if s.name in SCHEDULERS:
+        raise ValueError(f"scheduler already registered: {s.name}")
+    SCHEDULERS[s.name] = s
+    return s
+
+
+def get_scheduler(name: str) -> Scheduler:
+    try:
+        return SCHEDULERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown scheduler: {name}") from None
+
+
+register_scheduler(Scheduler("fcfs", "first come, first served", rank=lambda c: 0.0))
+register_scheduler(Scheduler("priority", "non-preemptive priority", rank=lambda c: float(c.priority)))
+register_scheduler(Scheduler("preemptive", "preemptive-resume priority",
+                             rank=lambda c: float(c.priority), preemptive=True))
+register_scheduler(Scheduler("sjf", "shortest expected job first (by class mean)", rank=lambda c: c.mean_s))
+
+
+def simulate_multiclass(
+    k: int,
+    n: int,
+    lam: float,
+    classes: Sequence[RequestClass],
+    rng: random.Random,
+    scheduler: str = "fcfs",
+) -> Tuple[List[Tuple[List[float], List[float], List[float]]], int]:
+    """
+    Simulate M/G/k with several request classes sharing the servers.
+
+    Returns: ([(latencies, queue_delays, service_times) per class], preemptions),
+    times in seconds. Queue delay is latency minus service time, so it includes
+    time spent preempted.
+
+    Model:
+      one Poisson arrival stream of rate lam; each arrival belongs to class c
+      with probability share_c and samples that class's service time
+      the scheduler picks which waiting job a free server takes next
+    The ready queue is a single heap keyed by (rank, arrival order) rather than
+    one heap per class, so schedulers only need to supply a rank. Preemptive
+    schedulers find the victim by scanning the k servers, so an event costs
+    O(log n) plus O(k) for an arrival that finds every server busy.
+    """
+    if k <= 0:
+        raise ValueError("k must be >= 1")
+    if n <= 0:
+        raise ValueError("n must be >= 1")
+    if lam <= 0:
+        raise ValueError("lam must be > 0")
+    if not classes:
+        raise ValueError("need at least one request class")
+    if any(c.share <= 0 for c in classes):
+        raise ValueError("class shares must be > 0")
+    sched = get_scheduler(scheduler)
+    preemptive = sched.preemptive
+
+    total = sum(c.share for c in classes)
+    cum: List[float] = []
+    acc = 0.0
+    for c in classes:
+        acc += c.share / total
+        cum.append(acc)
+    cum[-1] = 1.0
+    ranks = [sched.rank(c) for c in classes]
+    samplers = [c.sample_service for c in classes]
+
+    events: List[Tuple[float, int, int, Optional[_Job], int]] = []
+    ready: List[Tuple[float, int, _Job]] = []
+    on_server: List[Optional[_Job]] = [None] * k  # job running on each server
+    push = heapq.heappush
+    pop = heapq.heappop
+    eseq = 0
+
+    free: List[int] = list(range(k))
+    out: List[Tuple[List[float], List[float], List[float]]] = [([], [], []) for _ in classes]
+    preemptions = 0
+
+    def start(j: _Job, srv: int, t: float) -> None:
+        nonlocal eseq
+        j.server = srv
+        j.start = t
+        eseq += 1
+        push(events, (t + j.remaining, eseq, _EV_DEPART, j, j.gen))
+        on_server[srv] = j
+
+    push(events, (rng.expovariate(lam), 0, _EV_ARRIVAL, None, 0))
+    arrived = 0
+
+    while events:
+        now, _, kind, j, gen = pop(events)
+
+        if kind == _EV_DEPART:
+            if gen != j.gen:
+                continue  # preempted since this was scheduled
+            j.gen += 1
+            lat = now - j.arrival
+            lat_c, q_c, s_c = out[j.cls]
+            lat_c.append(lat)
+            q_c.append(lat - j.service)
+            s_c.append(j.service)
+            if ready:
+                start(pop(ready)[2], j.server, now)
+            else:
+                on_server[j.server] = None
+                free.append(j.server)
+            continue
+
+        # _EV_ARRIVAL
+        arrived += 1
+        u = rng.random()
+        c = 0
+        while cum[c] < u:
+            c += 1
+        j = _Job(c, now, samplers[c](), ranks[c], arrived)
+        if free:
+            start(j, free.pop(), now)
+        else:
+            victim = None
+            if preemptive:
+                # every server is busy: the lowest-priority, latest arrival loses
+                worst = max(on_server, key=lambda x: (x.rank, x.seq))
+                if worst.rank > j.rank:
+                    victim = worst
+            if victim is None:
+                push(ready, (j.rank, j.seq, j))
+            else:
+                preemptions += 1
+                victim.remaining -= now - victim.start
+                victim.gen += 1
+                srv = victim.server
+                push(ready, (victim.rank, victim.seq, victim))
+                start(j, srv, now)
+        if arrived < n:
+            eseq += 1
+            push(events, (now + rng.expovariate(lam), eseq, _EV_ARRIVAL, None, 0))
+
+    return out, preemptions
+
+
+def parse_class_spec(spec: str, base: DistParams, default_mean_ms: float) -> Tuple[str, float, int, str, float, DistParams]:
+    """
+    Parse name:share:priority:dist[:key=value,...] into
+    (name, share, priority, dist, mean_s, params).
+
+    Keys are mean_ms or any DistParams field, e.g.
+      read:0.9:0:exp
+      write:0.1:1:lognormal:mean_ms=50,lognorm_sigma=1.5
+    """
+    parts = spec.split(":")
+    if len(parts) not in (4, 5):
+        raise ValueError(f"bad class spec {spec!r}: want name:share:priority:dist[:key=value,...]")
+    name, share, priority, dist = parts[:4]
+    get_distribution(dist)
+    mean_ms = default_mean_ms
+    overrides: Dict[str, float] = {}
+    if len(parts) == 5 and parts[4]:
+        for kv in parts[4].split(","):
+            key, _, value = kv.partition("=")
+            if key == "mean_ms":
+                mean_ms = float(value)
+            elif key in DistParams.__dataclass_fields__:
+                overrides[key] = float(value)
+            else:
+                raise ValueError(f"bad class spec {spec!r}: unknown key {key!r}")
+    if not float(share) > 0:
+        raise ValueError(f"bad class spec {spec!r}: share must be > 0")
+    if not mean_ms > 0:
+        raise ValueError(f"bad class spec {spec!r}: mean_ms must be > 0")
+    return name, float(share), int(priority), dist, mean_ms / 1000.0, replace(base, **overrides)
+
+
+def print_class_summaries(summaries: List[Summary], scheduler: str, preemptions: int) -> None:
+    s0 = summaries[-1]
+    print("\n=== Multi-class M/G/k discrete-event simulation ===")
+    print(f"k={s0.k}  n={s0.n:,}  scheduler={scheduler}  preemptions={preemptions:,}")
+    print(f"lambda={s0.lam:.3f} req/s")
+    print(f"rho≈sum(lambda_c*E[S_c])/k = {s0.rho:.3f}")
+    print("")
+    print("Latency percentiles (ms):")
+    print(f"  {'class':<10} {'dist':<10} {'n':>9} {'rho_c':>6} {'p50':>10} {'p95':>10} "
+          f"{'p99':>10} {'p99.9':>10} {'mean q':>10}")
+    for s in summaries:
+        print(
+            f"  {s.request_class:<10} {s.dist:<10} {s.n:>9,} {s.rho:>6.3f} {s.p50_ms:>10.3f} {s.p95_ms:>10.3f} "
+            f"{s.p99_ms:>10.3f} {s.p999_ms:>10.3f} {s.mean_queue_ms:>10.3f}"
+        )
+    print("")
+
+
+# --------------------------
+# Autoscaling
+# --------------------------
+
+def piecewise_rate(points: Sequence[Tuple[float, float]]) -> Tuple[Callable[[float], float], float]:
+    """
+    Arrival rate interpolated linearly between (t_s, req_per_s) points, flat
+    outside them. Returns (rate(t), max_rate).
+    """
+    if not points:
+        raise ValueError("rate profile needs at least one point")
+    pts = sorted(points)
+    if any(r < 0 for _, r in pts):
+        raise ValueError("rates must be >= 0")
+    ts = [t for t, _ in pts]
+    rs = [r for _, r in pts]
+    max_rate = max(rs)
+    if max_rate <= 0:
+        raise ValueError("rate profile must have a positive rate somewhere")
+
+    def rate(t: float) -> float:
+        i = bisect.bisect_right(ts, t)
+        if i == 0:
+            return rs[0]
+        if i == len(ts):
+            return rs[-1]
+        t0, t1 = ts[i - 1], ts[i]
+        return rs[i - 1] + (rs[i] - rs[i - 1]) * (t - t0) / (t1 - t0)
+
+    return rate, max_rate
+
+
+def parse_rate_profile(spec: str) -> List[Tuple[float, float]]:
+    """Parse "t_s:rate,t_s:rate,..." e.g. "0:200,3600:200,4200:600"."""
+    points: List[Tuple[float, float]] = []
+    for item in spec.split(","):
+        t, sep, r = item.partition(":")
+        if not sep:
+            raise ValueError(f"bad rate profile point {item!r}: want t_s:req_per_s")
+        points.append((float(t), float(r)))
+    return points
+
+
+@dataclass(frozen=True)
+class AutoscalePolicy:
+    """
+    Utilization-target autoscaler.
+
+    Every eval_s it measures average busy servers over the last period and
+    wants ceil(busy / target_util) servers, clamped to [min_k, max_k].
+    Scale-ups are ordered at once but only serve traffic up_delay_s later;
+    scale-downs wait until cooldown_s after the last scaling action.
+    """
+    target_util: float = 0.6
+    eval_s: float = 15.0
+    up_delay_s: float = 120.0
+    cooldown_s: float = 300.0
+    min_k: int = 1
+    max_k: int = 1000
+
+
+@dataclass
+class AutoscaleStats:
+    horizon_s: float
+    arrivals: int
+    completed: int
+    latency: LatencySketch
+    latency_sum_s: float
+    slo_violations: int  # requests slower than slo_s
+    windows: int
+    slo_bad_windows: int  # windows whose p99 is above slo_s
+    server_seconds: float  # billed: active + provisioning + draining
+    peak_servers: int
+    scale_ups: int
+    scale_downs: int
+
+
+def simulate_autoscale(
+    k: int,
+    horizon_s: float,
+    rate: Callable[[float], float],
+    max_rate: float,
+    sample_service: Callable[[], float],
+    rng: random.Random,
+    policy: AutoscalePolicy,
+    *,
+    slo_s: float,
+    window_s: float = 60.0,
+    on_window: Optional[Callable[[WindowStats], None]] = None,
+) -> AutoscaleStats:
+    """
+    Simulate G/G/k FCFS where k follows an autoscaling policy and arrivals are
+    a non-homogeneous Poisson process with rate(t), sampled by thinning against
+    max_rate. Arrivals stop at horizon_s; requests in flight are drained.
+    The policy keeps evaluating, and servers keep being billed, until horizon_s
+    even if traffic stops earlier; the reported horizon is
+    max(horizon_s, last drain).
+
+    Servers are billed from the moment they are ordered until they are
+    retired; a scale-down lets busy servers finish their current request.
+
+    Latencies go into a LatencySketch and a per-window time series
+    (WindowedMetrics, passed to on_window), so memory stays bounded for
+    day-long horizons. The loop keeps only departures in a heap; arrival,
+    evaluation and capacity-ready times are compared directly.
+    """
+    if not (policy.min_k >= 1 and policy.min_k <= k <= policy.max_k):
+        raise ValueError("need 1 <= min_k <= k <= max_k")
+    if not (0.0 < policy.target_util <= 1.0):
+        raise ValueError("target_util must be in (0,1]")
+    if policy.eval_s <= 0 or policy.up_delay_s < 0 or policy.cooldown_s < 0:
+        raise ValueError("eval_s must be > 0, up_delay_s and cooldown_s >= 0")
+    if horizon_s <= 0:
+        raise ValueError("horizon_s must be > 0")
+    if max_rate <= 0:
+        raise ValueError("max_rate must be > 0")
+
+    inf = math.inf
+    expovariate = rng.expovariate
+    random_ = rng.random
+    push = heapq.heappush
+    pop = heapq.heappop
+
+    sketch = LatencySketch()
+    bad_windows = 0
+    windows = 0
+
+    def window_done(w: WindowStats) -> None:
+        nonlocal bad_windows, windows
+        windows += 1
+        if w.p99_ms > slo_s * 1000.0:
+            bad_windows += 1
+        if on_window is not None:
+            on_window(w)
+
+    metrics = WindowedMetrics(window_s, k, on_window=window_done)
+    level = metrics.level
+    complete = metrics.complete
+
+    deps: List[Tuple[float, float]] = []  # (end, latency)
+    queue: deque = deque()  # (arrival, service)
+    ready: deque = deque()  # (time, servers) ordered but not yet serving
+    busy = 0
+    pending = 0
+    peak = k
+
+    busy_area = 0.0  # since the last evaluation
+    billed_area = 0.0
+    last_t = 0.0
+    last_scale = -inf
+    scale_ups = scale_downs = 0
+
+    arrivals = completed = slow = 0
+    lat_sum = 0.0
+
+    def next_arrival(t: float) -> float:
+        while True:
+            t += expovariate(max_rate)
+            if t >= horizon_s:
+                return inf
+            if random_() * max_rate < rate(t):
+                return t
+
+    next_arr = next_arrival(0.0)
+    next_eval = policy.eval_s
+
+    while True:
+        t_dep = deps[0][0] if deps else inf
+        t_ready = ready[0][0] if ready else inf
+        t = min(next_arr, t_dep, next_eval, t_ready)
+        if t == inf:
+            break
+
+        dt = t - last_t
+        busy_area += busy * dt
+        billed_area += (k + pending + (busy - k if busy > k else 0)) * dt
+        last_t = t
+
+        if t == t_dep:
+            _, lat = pop(deps)
+            completed += 1
+            lat_sum += lat
+            if lat > slo_s:
+                slow += 1
+            sketch.add(lat)
+            complete(t, lat)
+            busy -= 1
+            if queue and busy < k:
+                a, s = queue.popleft()
+                busy += 1
+                push(deps, (t + s, t + s - a))
+        elif t == next_arr:
+            arrivals += 1
+            s = sample_service()
+            if busy < k:
+                busy += 1
+                push(deps, (t + s, s))
+            else:
+                queue.append((t, s))
+            next_arr = next_arrival(t)
+        elif t == t_ready:
+            _, n_new = ready.popleft()
+            pending -= n_new
+            k += n_new
+            while queue and busy < k:
+                a, s = queue.popleft()
+                busy += 1
+                push(deps, (t + s, t + s - a))
+        else:  # evaluation
+            busy_avg = busy_area / policy.eval_s
+            busy_area = 0.0
+            want = math.ceil(busy_avg / policy.target_util - 1e-9)
+            want = min(policy.max_k, max(policy.min_k, want))
+            if want > k + pending:
+                n_new = want - k - pending
+                pending += n_new
+                ready.append((t + policy.up_delay_s, n_new))
+                last_scale = t
+                scale_ups += 1
+            elif want < k and not pending and t - last_scale >= policy.cooldown_s:
+                k = want
+                last_scale = t
+                scale_downs += 1
+            next_eval = t + policy.eval_s if t + policy.eval_s < horizon_s else inf
+            if k + pending > peak:
+                peak = k + pending
+
+        level(t, len(queue), busy, k)
+
+    # Idle tail: nothing is pending or busy, only the k servers left are billed.
+    end = max(horizon_s, last_t)
+    billed_area += k * (end - last_t)
+    metrics.close(end)
+
+    return AutoscaleStats(
+        horizon_s=end,
+        arrivals=arrivals,
+        completed=completed,
+        latency=sketch,
+        latency_sum_s=lat_sum,
+        slo_violations=slow,
+        windows=windows,
+        slo_bad_windows=bad_windows,
+        server_seconds=billed_area,
+        peak_servers=peak,
+        scale_ups=scale_ups,
+        scale_downs=scale_downs,
+    )
+
+
+def add_autoscale_args(ap: argparse.ArgumentParser) -> None:
+    d = AutoscalePolicy()
+    ap.add_argument("--rate-profile", type=str, default=None,
+                    help="time-varying arrival rate t_s:req_per_s,... (linear in between); enables autoscaling")
+    ap.add_argument("--horizon-s", type=float, default=3600.0, help="simulated time to generate arrivals for")
+    ap.add_argument("--target-util", type=float, default=d.target_util)
+    ap.add_argument("--eval-s", type=float, default=d.eval_s, help="autoscaler evaluation period")
+    ap.add_argument("--up-delay-s", type=float, default=d.up_delay_s,
+                    help="time from ordering a server until it serves traffic")
+    ap.add_argument("--cooldown-s", type=float, default=d.cooldown_s,
+                    help="minimum time after a scaling action before scaling down")
+    ap.add_argument("--min-k", type=int, default=d.min_k)
+    ap.add_argument("--max-k", type=int, default=d.max_k)
+    ap.add_argument("--slo-ms", type=float, default=100.0, help="latency SLO for violation counts")
+    ap.add_argument("--slo-window-s", type=float, default=60.0,
+                    help="window for counting p99 > SLO (and --timeseries windows in autoscaling mode)")
+
+
+def autoscale_policy_from_args(args: argparse.Namespace) -> AutoscalePolicy:
+    return AutoscalePolicy(
+        target_util=args.target_util,
+        eval_s=args.eval_s,
+        up_delay_s=args.up_delay_s,
+        cooldown_s=args.cooldown_s,
+        min_k=args.min_k,
+        max_k=args.max_k,
+    )
+
+
+def print_autoscale(st: AutoscaleStats, policy: AutoscalePolicy, slo_ms: float, dist: str) -> None:
+    q = st.latency.quantile
+    print("\n=== Autoscaled G/G/k discrete-event simulation ===")
+    print(f"horizon={st.horizon_s:,.0f} s  arrivals={st.arrivals:,}  completed={st.completed:,}")
+    print(f"dist={dist}")
+    print(f"policy: target_util={policy.target_util:.2f} eval={policy.eval_s:g}s "
+          f"up_delay={policy.up_delay_s:g}s cooldown={policy.cooldown_s:g}s k∈[{policy.min_k}, {policy.max_k}]")
+    print("")
+    print("Latency percentiles (ms, 1% sketch):")
+    print(f"  p50   {q(0.50) * 1000.0:.3f}")
+    print(f"  p95   {q(0.95) * 1000.0:.3f}")
+    print(f"  p99   {q(0.99) * 1000.0:.3f}")
+    print(f"  p99.9 {q(0.999) * 1000.0:.3f}")
+    print(f"  mean  {st.latency_sum_s / max(st.completed, 1) * 1000.0:.3f}")
+    print("")
+    print("Cost:")
+    print(f"  server-hours          {st.server_seconds / 3600.0:.2f}")
+    print(f"  mean servers          {st.server_seconds / st.horizon_s if st.horizon_s > 0 else float('nan'):.2f}")
+    print(f"  peak servers          {st.peak_servers}")
+    print(f"  scale ups / downs     {st.scale_ups} / {st.scale_downs}")
+    print("")
+    print(f"SLO ({slo_ms:g} ms):")
+    print(f"  slow requests         {st.slo_violations / max(st.completed, 1):.4%}")
+    print(f"  windows with p99>SLO  {st.slo_bad_windows} of {st.windows}")
+    print("")
+
+
+# --------------------------
+# CLI
+# --------------------------
+
+def run_fanout(args, mean_s: float, lam: float) -> None:
+    if args.shards <= 0:
+        raise SystemExit("--shards must be >= 1")
+    quorums = [args.shards]
+    if args.quorum is not None:
+        if not (1 <= args.quorum <= args.shards):
+            raise SystemExit("--quorum must be in [1, --shards]")
+        if args.quorum != args.shards:
+            quorums.insert(0, args.quorum)
+
+    np_rng = np.random.default_rng(args.seed)
+    sample_batch = batch_service_sampler(
+        dist=args.dist,
+        mean_s=mean_s,
+        np_rng=np_rng,
+        params=dist_params_from_args(args),
+    )
+    by_quorum, shard0 = simulate_fanout(
+        k=args.k,
+        n=args.n,
+        lam=lam,
+        shards=args.shards,
+        sample_batch=sample_batch,
+        np_rng=np_rng,
+        quorums=quorums,
+    )
+
+    common = dict(k=args.k, n=args.n, shards=args.shards, mean_s=mean_s,
+                  lam=lam, rho=args.rho, dist=args.dist)
+    summaries = [summarize_fanout(shard0, quorum=0, **common)]
+    summaries += [summarize_fanout(by_quorum[q], quorum=q, **common) for q in quorums]
+    print_fanout(summaries)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["shard0_ms"] + [f"q{q}_ms" for q in quorums])
+            cols = [shard0] + [by_quorum[q] for q in quorums]
+            for row in zip(*cols):
+                w.writerow([x * 1000.0 for x in row])
+        print(f"Wrote samples to {args.csv}")
+
+
+def run_multiclass(args, rng: random.Random) -> None:
+    base = dist_params_from_args(args)
+    classes: List[RequestClass] = []
+    for spec in args.request_class:
+        try:
+            name, share, priority, dist, mean_s, params = parse_class_spec(spec, base, args.mean_ms)
+            sample, _ = service_sampler(dist=dist, mean_s=mean_s, rng=rng, params=params)
+        except ValueError as e:
+            raise SystemExit(f"--class: {e}")
+        classes.append(RequestClass(name, share, priority, dist, mean_s, sample))
+
+    # rho = lambda * E[S] / k with E[S] = sum_c share_c * E[S_c]
+    total = sum(c.share for c in classes)
+    mean_s = sum(c.share * c.mean_s for c in classes) / total
+    lam = args.rho * args.k / mean_s
+
+    per_class, preemptions = simulate_multiclass(
+        k=args.k,
+        n=args.n,
+        lam=lam,
+        classes=classes,
+        rng=rng,
+        scheduler=args.sched,
+    )
+
+    summaries: List[Summary] = []
+    for c, (lat_s, q_s, s_s) in zip(classes, per_class):
+        lam_c = lam * c.share / total
+        summaries.append(summarize(
+            lat_s, q_s, s_s,
+            k=args.k,
+            n=len(lat_s),
+            mean_s=c.mean_s,
+            lam=lam_c,
+            rho=lam_c * c.mean_s / args.k,
+            dist=c.dist,
+            request_class=c.name,
+        ))
+    all_lat = [x for lat_s, _, _ in per_class for x in lat_s]
+    all_q = [x for _, q_s, _ in per_class for x in q_s]
+    all_s = [x for _, _, s_s in per_class for x in s_s]
+    summaries.append(summarize(
+        all_lat, all_q, all_s,
+        k=args.k,
+        n=args.n,
+        mean_s=mean_s,
+        lam=lam,
+        rho=args.rho,
+        dist="-",
+        request_class="all",
+    ))
+    print_class_summaries(summaries, args.sched, preemptions)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["class", "latency_ms", "queue_ms", "service_ms"])
+            for c, (lat_s, q_s, s_s) in zip(classes, per_class):
+                for lat, q, sv in zip(lat_s, q_s, s_s):
+                    w.writerow([c.name, lat * 1000.0, q * 1000.0, sv * 1000.0])
+        print(f"Wrote samples to {args.csv}")
+
+
+def run_autoscale(args, rng: random.Random, mean_s: float) -> None:
+    try:
+        rate, max_rate = piecewise_rate(parse_rate_profile(args.rate_profile))
+    except ValueError as e:
+        raise SystemExit(f"--rate-profile: {e}")
+    policy = autoscale_policy_from_args(args)
+    if not (1 <= policy.min_k <= args.k <= policy.max_k):
+        raise SystemExit("need 1 <= --min-k <= --k <= --max-k")
+    if not (0.0 < policy.target_util <= 1.0):
+        raise SystemExit("--target-util must be in (0,1]")
+    if policy.eval_s <= 0 or policy.up_delay_s < 0 or policy.cooldown_s < 0:
+        raise SystemExit("--eval-s must be > 0, --up-delay-s and --cooldown-s >= 0")
+    if args.horizon_s <= 0:
+        raise SystemExit("--horizon-s must be > 0")
+    if args.slo_window_s <= 0:
+        raise SystemExit("--slo-window-s must be > 0")
+    if args.window_ms is not None:
+        raise SystemExit("--window-ms does not apply to --rate-profile; use --slo-window-s")
+    sample_svc, _ = service_sampler(
+        dist=args.dist,
+        mean_s=mean_s,
+        rng=rng,
+        params=dist_params_from_args(args),
+    )
+
+    ts = TimeseriesWriter(args.timeseries) if args.timeseries is not None else None
+    st = simulate_autoscale(
+        k=args.k,
+        horizon_s=args.horizon_s,
+        rate=rate,
+        max_rate=max_rate,
+        sample_service=sample_svc,
+        rng=rng,
+        policy=policy,
+        slo_s=args.slo_ms / 1000.0,
+        window_s=args.slo_window_s,
+        on_window=ts,
+    )
+    print_autoscale(st, policy, args.slo_ms, args.dist)
+    if ts is not None:
+        ts.close()
+        print_timeseries(ts, args.slo_window_s)
+        print(f"Wrote time series to {args.timeseries}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--k", type=int, default=1, help="number of servers/workers")
+    ap.add_argument("--n", type=int, default=200_000, help="number of requests to simulate")
+    ap.add_argument("--seed", type=int, default=7)
+
+    # Parameterize by rho because it's what you want to talk about in the blog
+    ap.add_argument("--rho", type=float, default=0.8, help="target utilization rho in (0,1)")
+    ap.add_argument("--mean-ms", type=float, default=10.0, help="target mean service time E[S] in ms")
+
+    add_distribution_args(ap, default="const", lognorm_sigma=1.0)
+
+    # timeouts / retries / hedging (switch to the event-driven simulator)
+    ap.add_argument("--timeout-ms", type=float, default=None,
+                    help="per-attempt client timeout")
+    ap.add_argument("--max-retries", type=int, default=0,
+                    help="client retries after a timeout (requires --timeout-ms)")
+    ap.add_argument("--backoff-ms", type=float, default=0.0,
+                    help="base retry backoff, doubled on every retry")
+    ap.add_argument("--hedge-ms", type=float, default=None,
+                    help="send one hedged duplicate if the request is still pending after this delay")
+    ap.add_argument("--no-cancel-on-timeout", action="store_true",
+                    help="servers keep running attempts the client timed out on")
+
+    # admission control / load shedding (also event-driven)
+    ap.add_argument("--max-queue", type=int, default=None,
+                    help="reject arrivals when this many requests are already queued")
+    ap.add_argument("--max-inflight", type=int, default=None,
+                    help="reject arrivals when this many requests are queued or in service")
+    ap.add_argument("--codel", action="store_true",
+                    help="drop requests whose queue delay exceeds the CoDel limit")
+    ap.add_argument("--codel-target-ms", type=float, default=5.0,
+                    help="queue-delay limit while the queue is standing")
+    ap.add_argument("--codel-interval-ms", type=float, default=100.0,
+                    help="queue not empty for this long => standing queue")
+    ap.add_argument("--adaptive-lifo", action="store_true",
+                    help="serve newest first while the queue is standing")
+
+    # fan-out / scatter-gather
+    ap.add_argument("--shards", type=int, default=None,
+                    help="fan every request out to this many M/G/k backends")
+    ap.add_argument("--quorum", type=int, default=None,
+                    help="also report waiting for the fastest q of --shards (wait-all is always reported)")
+
+    # multiple request classes
+    ap.add_argument("--class", dest="request_class", action="append", default=None,
+                    metavar="NAME:SHARE:PRIORITY:DIST[:KEY=VALUE,...]",
+                    help="add a request class (repeatable); keys are mean_ms or distribution "
+                         "parameters, e.g. write:0.1:1:lognormal:mean_ms=50,lognorm_sigma=1.5")
+    ap.add_argument("--sched", type=str, default="fcfs", choices=list(SCHEDULERS),
+                    help="; ".join(f"{x.name}: {x.help}" for x in SCHEDULERS.values()))
+
+    # autoscaling (time-varying arrival rate and server count)
+    add_autoscale_args(ap)
+
+    # windowed time series (also event-driven)
+    ap.add_argument("--timeseries", type=str, default=None,
+                    help="optional path to write per-window throughput/utilization/queue/p50/p99 CSV")
+    ap.add_argument("--window-ms", type=float, default=None,
+                    help="time-series window length (default 1000; autoscaling uses --slo-window-s)")
 
     ap.add_argument("--csv", type=str, default=None, help="optional path to write per-request samples")
 
@@ -324,22 +2215,122 @@ def main() -> None:
     # rho = lambda * E[S] / k  => lambda = rho * k / E[S]
     lam = args.rho * args.k / mean_s
 
+    # --shards, --class and --rate-profile each select their own simulator,
+    # which ignores the event-driven options; refuse rather than drop them.
+    modes = [flag for flag, on in (
+        ("--shards", args.shards is not None),
+        ("--class", bool(args.request_class)),
+        ("--rate-profile", args.rate_profile is not None),
+    ) if on]
+    event_flags = [flag for flag, on in (
+        ("--timeout-ms", args.timeout_ms is not None),
+        ("--max-retries", bool(args.max_retries)),
+        ("--hedge-ms", args.hedge_ms is not None),
+        ("--max-queue", args.max_queue is not None),
+        ("--max-inflight", args.max_inflight is not None),
+        ("--codel", args.codel),
+        ("--adaptive-lifo", args.adaptive_lifo),
+    ) if on]
+    if len(modes) > 1:
+        raise SystemExit(f"{modes[0]} cannot be combined with {modes[1]}")
+    if modes and event_flags:
+        raise SystemExit(f"{event_flags[0]} cannot be combined with {modes[0]}")
+    if args.timeseries is not None and modes[:1] in (["--shards"], ["--class"]):
+        raise SystemExit(f"--timeseries cannot be combined with {modes[0]}")
+    if args.csv and modes == ["--rate-profile"]:
+        raise SystemExit("--csv cannot be combined with --rate-profile (no per-request samples); use --timeseries")
+    if args.quorum is not None and args.shards is None:
+        raise SystemExit("--quorum requires --shards")
+    if args.sched != "fcfs" and not args.request_class:
+        raise SystemExit("--sched requires --class")
+
+    if args.shards is not None:
+        run_fanout(args, mean_s, lam)
+        return
+    if args.request_class:
+        run_multiclass(args, rng)
+        return
+    if args.rate_profile is not None:
+        run_autoscale(args, rng, mean_s)
+        return
+
+    params = dist_params_from_args(args)
     sample_svc, _ = service_sampler(
         dist=args.dist,
         mean_s=mean_s,
         rng=rng,
-        lognorm_sigma=args.lognorm_sigma,
-        mix_p=args.mix_p,
-        slow_mult=args.slow_mult,
+        params=params,
     )
 
-    lat_s, q_s, s_s = simulate_mgk(
-        k=args.k,
-        n=args.n,
-        lam=lam,
-        sample_service=sample_svc,
-        rng=rng,
+    stats = None
+    event_driven = (
+        args.timeout_ms is not None or args.hedge_ms is not None
+        or args.max_queue is not None or args.max_inflight is not None
+        or args.codel or args.adaptive_lifo or args.timeseries is not None
     )
+    # Check up front: simulate_events raises ValueError for these, and
+    # --timeseries would already have created its file by then.
+    if args.k <= 0 or args.n <= 0:
+        raise SystemExit("--k and --n must be >= 1")
+    if args.timeout_ms is not None and args.timeout_ms <= 0:
+        raise SystemExit("--timeout-ms must be > 0")
+    if args.max_retries < 0:
+        raise SystemExit("--max-retries must be >= 0")
+    if args.max_retries and not (
+        args.timeout_ms is not None or args.max_queue is not None
+        or args.max_inflight is not None or args.codel
+    ):
+        raise SystemExit("--max-retries requires --timeout-ms, --max-queue, --max-inflight or --codel")
+    if args.backoff_ms < 0:
+        raise SystemExit("--backoff-ms must be >= 0")
+    if args.hedge_ms is not None and args.hedge_ms < 0:
+        raise SystemExit("--hedge-ms must be >= 0")
+    if args.max_queue is not None and args.max_queue < 0:
+        raise SystemExit("--max-queue must be >= 0")
+    if args.max_inflight is not None and args.max_inflight <= 0:
+        raise SystemExit("--max-inflight must be >= 1")
+    if args.codel_target_ms <= 0 or args.codel_interval_ms <= 0:
+        raise SystemExit("--codel-target-ms and --codel-interval-ms must be > 0")
+
+    ts = None
+    metrics = None
+    if args.window_ms is None:
+        args.window_ms = 1000.0
+    if args.timeseries is not None:
+        if args.window_ms <= 0:
+            raise SystemExit("--window-ms must be > 0")
+        # Windows are written as they close; only the current one stays in memory.
+        ts = TimeseriesWriter(args.timeseries)
+        metrics = WindowedMetrics(args.window_ms / 1000.0, args.k, on_window=ts)
+
+    if event_driven:
+        lat_s, q_s, s_s, stats = simulate_events(
+            k=args.k,
+            n=args.n,
+            lam=lam,
+            sample_service=sample_svc,
+            rng=rng,
+            timeout_s=args.timeout_ms / 1000.0 if args.timeout_ms is not None else None,
+            max_retries=args.max_retries,
+            backoff_s=args.backoff_ms / 1000.0,
+            hedge_s=args.hedge_ms / 1000.0 if args.hedge_ms is not None else None,
+            cancel_on_timeout=not args.no_cancel_on_timeout,
+            max_queue=args.max_queue,
+            max_inflight=args.max_inflight,
+            codel=args.codel,
+            adaptive_lifo=args.adaptive_lifo,
+            codel_target_s=args.codel_target_ms / 1000.0,
+            codel_interval_s=args.codel_interval_ms / 1000.0,
+            metrics=metrics,
+        )
+    else:
+        lat_s, q_s, s_s = simulate_mgk(
+            k=args.k,
+            n=args.n,
+            lam=lam,
+            sample_service=sample_svc,
+            rng=rng,
+        )
 
     summ = summarize(
         lat_s, q_s, s_s,
@@ -349,9 +2340,16 @@ def main() -> None:
         lam=lam,
         rho=args.rho,
         dist=args.dist,
+        stats=stats,
+        target_cs2=get_distribution(args.dist).cs2(params),
     )
     print_summary(summ)
 
+    if ts is not None:
+        ts.close()
+        print_timeseries(ts, args.window_ms / 1000.0)
+        print(f"Wrote time series to {args.timeseries}")
+
     if args.csv:
         write_csv(args.csv, lat_s, q_s, s_s)
         print(f"Wrote samples to {args.csv}")
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Sweep rho, C_s, or retries and plot latency metrics using the queue_sim.py discrete-event simulator.
+Sweep rho, C_s, retries, hedge delay, fan-out width, load shedding, or an autoscaling policy parameter and plot latency metrics using the queue_sim.py discrete-event simulator.
 
 Requires:
   - queue_sim.py in same directory (the simulator you already have)
@@ -11,7 +11,12 @@ Examples:
   python sweep_plot.py --dist lognormal --lognorm-sigma 1.2 --out sweep_lognorm.png
   python sweep_plot.py --dist const --out sweep_const.png
   python sweep_plot.py --sweep cs --dist lognormal --rho 0.7 --cs-min 0.5 --cs-max 2.0 --cs-step 0.1 --out sweep_cs.png
+  python sweep_plot.py --sweep cs --dist weibull --rho 0.7 --cs-min 0.5 --cs-max 4.0 --cs-step 0.1 --out sweep_cs_weibull.png
   python sweep_plot.py --sweep retries --dist const --mean-ms 10 --retry-p 0.1 --rho-min 0.2 --rho-max 0.9 --rho-step 0.05 --out sweep_retries.png
+  python sweep_plot.py --sweep hedge --dist mixture --k 4 --rho 0.7 --hedge-min-ms 5 --hedge-max-ms 50 --hedge-step-ms 5 --out sweep_hedge.png
+  python sweep_plot.py --sweep shards --dist lognormal --k 1 --rho 0.5 --shards-min 1 --shards-max 100 --shards-step 9 --quorum-frac 0.95 --out sweep_shards.png
+  python sweep_plot.py --sweep shed --dist mixture --k 4 --max-queue 20 --codel --rho-min 0.5 --rho-max 0.99 --rho-step 0.01 --out sweep_shed.png
+  python sweep_plot.py --sweep autoscale --dist lognormal --k 4 --rate-profile 0:200,3600:200,4200:800,7200:800 --horizon-s 10800 --autoscale-param up_delay_s --param-values 0,60,120,240 --out sweep_autoscale.png
 """
 
 from __future__ import annotations
@@ -20,20 +25,39 @@ import argparse
 import csv
 import math
 import random
-from dataclasses import dataclass
-from typing import List, Dict
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
 
 import matplotlib.pyplot as plt
+import numpy as np
 
 # Import from your simulator file
-from queue_sim import inservice_retry_sampler, lognorm_sigma_from_cs2, service_sampler, simulate_mgk, summarize
+from queue_sim import (
+    add_autoscale_args,
+    add_distribution_args,
+    autoscale_policy_from_args,
+    batch_service_sampler,
+    dist_params_from_args,
+    get_distribution,
+    inservice_retry_sampler,
+    parse_rate_profile,
+    piecewise_rate,
+    service_sampler,
+    simulate_autoscale,
+    simulate_events,
+    simulate_fanout,
+    simulate_mgk,
+    summarize,
+    summarize_fanout,
+)
 
 
 @dataclass
 class Point:
     rho: float
     cs: float
-    cs2: float
+    cs2: float  # observed
+    target_cs2: float  # theoretical, from Distribution.cs2
     p50_ms: float
     p95_ms: float
     p99_ms: float
@@ -53,6 +77,51 @@ class RetryPoint:
     mean_q_ms: float
 
 
+@dataclass
+class HedgePoint:
+    hedge_ms: float  # nan for the no-hedging baseline
+    p50_ms: float
+    p99_ms: float
+    p999_ms: float
+    utilization: float
+    wasted_frac: float
+    attempts_per_req: float
+
+
+@dataclass
+class FanoutPoint:
+    shards: int
+    quorum: int  # 0 when --quorum-frac is not set
+    shard_p99_ms: float
+    all_p50_ms: float
+    all_p99_ms: float
+    all_p999_ms: float
+    quorum_p99_ms: float
+
+
+@dataclass
+class ShedPoint:
+    rho: float
+    base_p99_ms: float  # unbounded FIFO
+    shed_p99_ms: float
+    shed_p999_ms: float
+    drop_rate: float  # rejected + shed, per attempt
+    goodput: float  # completed requests per second
+
+
+@dataclass
+class AutoscalePoint:
+    value: float  # swept policy parameter
+    p50_ms: float
+    p99_ms: float
+    p999_ms: float
+    slow_frac: float  # requests slower than the SLO
+    bad_windows: int  # windows with p99 above the SLO
+    windows: int
+    server_hours: float
+    peak_servers: int
+
+
 def frange(start: float, stop: float, step: float) -> List[float]:
     vals = []
     x = start
@@ -71,14 +140,14 @@ def run_rho_sweep(args) -> List[Point]:
     points: List[Point] = []
 
     # Build the service sampler once; it uses rng, which advances as we sample.
+    params = dist_params_from_args(args)
     sample_svc, _ = service_sampler(
         dist=args.dist,
         mean_s=mean_s,
         rng=rng,
-        lognorm_sigma=args.lognorm_sigma,
-        mix_p=args.mix_p,
-        slow_mult=args.slow_mult,
+        params=params,
     )
+    target_cs2 = get_distribution(args.dist).cs2(params)
 
     for rho in rhos:
         lam = rho * args.k / mean_s  # rho = lambda * E[S] / k
@@ -112,6 +181,7 @@ def run_rho_sweep(args) -> List[Point]:
                 mean_ms=summ.mean_latency_ms,
                 mean_q_ms=summ.mean_queue_ms,
                 cs2=summ.cs2,
+                target_cs2=target_cs2,
             )
         )
 
@@ -125,24 +195,27 @@ def run_rho_sweep(args) -> List[Point]:
 
 
 def run_cs_sweep(args) -> List[Point]:
-    if args.dist != "lognormal":
-        raise SystemExit("--sweep cs currently supports only --dist lognormal")
+    dist = get_distribution(args.dist)
+    if dist.fit_cs2 is None:
+        raise SystemExit(f"--sweep cs needs a distribution with a tunable C_s^2; {args.dist} is fixed")
 
     rng = random.Random(args.seed)
     mean_s = args.mean_ms / 1000.0
     cs_vals = frange(args.cs_min, args.cs_max, args.cs_step)
     points: List[Point] = []
+    base_params = dist_params_from_args(args)
 
     for cs in cs_vals:
         cs2 = cs * cs
-        sigma = lognorm_sigma_from_cs2(cs2)
+        try:
+            params = dist.fit_cs2(base_params, cs2)
+        except ValueError as e:
+            raise SystemExit(f"--sweep cs: C_s={cs:g}: {e}")
         sample_svc, _ = service_sampler(
-            dist="lognormal",
+            dist=args.dist,
             mean_s=mean_s,
             rng=rng,
-            lognorm_sigma=sigma,
-            mix_p=args.mix_p,
-            slow_mult=args.slow_mult,
+            params=params,
         )
         lam = args.rho * args.k / mean_s
 
@@ -169,6 +242,7 @@ def run_cs_sweep(args) -> List[Point]:
                 rho=args.rho,
                 cs=cs,
                 cs2=summ.cs2,
+                target_cs2=dist.cs2(params),
                 p50_ms=summ.p50_ms,
                 p95_ms=summ.p95_ms,
                 p99_ms=summ.p99_ms,
@@ -196,9 +270,7 @@ def run_retries_sweep(args) -> List[RetryPoint]:
         dist=args.dist,
         mean_s=mean_s,
         rng=rng,
-        lognorm_sigma=args.lognorm_sigma,
-        mix_p=args.mix_p,
-        slow_mult=args.slow_mult,
+        params=dist_params_from_args(args),
     )
     inservice_sampler = inservice_retry_sampler(base_sampler, args.retry_p, rng)
 
@@ -276,15 +348,210 @@ def run_retries_sweep(args) -> List[RetryPoint]:
     return points
 
 
+def run_hedge_sweep(args) -> List[HedgePoint]:
+    rng = random.Random(args.seed)
+    mean_s = args.mean_ms / 1000.0
+    lam = args.rho * args.k / mean_s
+    # None first: the no-hedging baseline to compare against.
+    delays: List[Optional[float]] = [None]
+    delays += frange(args.hedge_min_ms, args.hedge_max_ms, args.hedge_step_ms)
+
+    sample_svc, _ = service_sampler(
+        dist=args.dist,
+        mean_s=mean_s,
+        rng=rng,
+        params=dist_params_from_args(args),
+    )
+
+    points: List[HedgePoint] = []
+    for hedge_ms in delays:
+        lat_s, q_s, s_s, stats = simulate_events(
+            k=args.k,
+            n=args.n,
+            lam=lam,
+            sample_service=sample_svc,
+            rng=rng,
+            hedge_s=hedge_ms / 1000.0 if hedge_ms is not None else None,
+        )
+        summ = summarize(
+            lat_s, q_s, s_s,
+            k=args.k,
+            n=args.n,
+            mean_s=mean_s,
+            lam=lam,
+            rho=args.rho,
+            dist=args.dist,
+            stats=stats,
+        )
+        points.append(
+            HedgePoint(
+                hedge_ms=hedge_ms if hedge_ms is not None else float("nan"),
+                p50_ms=summ.p50_ms,
+                p99_ms=summ.p99_ms,
+                p999_ms=summ.p999_ms,
+                utilization=summ.utilization,
+                wasted_frac=summ.wasted_frac,
+                attempts_per_req=summ.attempts_per_req,
+            )
+        )
+
+        if args.verbose:
+            label = "none" if hedge_ms is None else f"{hedge_ms:.1f}ms"
+            print(
+                f"hedge={label} p99={summ.p99_ms:.2f} p999={summ.p999_ms:.2f} "
+                f"util={summ.utilization:.3f} attempts={summ.attempts_per_req:.3f}"
+            )
+
+    return points
+
+
+def run_shards_sweep(args) -> List[FanoutPoint]:
+    np_rng = np.random.default_rng(args.seed)
+    mean_s = args.mean_ms / 1000.0
+    lam = args.rho * args.k / mean_s
+
+    sample_batch = batch_service_sampler(
+        dist=args.dist,
+        mean_s=mean_s,
+        np_rng=np_rng,
+        params=dist_params_from_args(args),
+    )
+
+    points: List[FanoutPoint] = []
+    for shards in range(args.shards_min, args.shards_max + 1, args.shards_step):
+        quorum = 0
+        quorums = [shards]
+        if args.quorum_frac is not None:
+            # epsilon so e.g. 0.95 * 20 does not round up to 20
+            quorum = max(1, math.ceil(args.quorum_frac * shards - 1e-9))
+            if quorum != shards:
+                quorums.insert(0, quorum)
+
+        by_quorum, shard0 = simulate_fanout(
+            k=args.k,
+            n=args.n,
+            lam=lam,
+            shards=shards,
+            sample_batch=sample_batch,
+            np_rng=np_rng,
+            quorums=quorums,
+        )
+        common = dict(k=args.k, n=args.n, shards=shards, mean_s=mean_s,
+                      lam=lam, rho=args.rho, dist=args.dist)
+        one = summarize_fanout(shard0, quorum=0, **common)
+        wait_all = summarize_fanout(by_quorum[shards], quorum=shards, **common)
+        quorum_p99 = float("nan")
+        if quorum:
+            quorum_p99 = summarize_fanout(by_quorum[quorum], quorum=quorum, **common).p99_ms
+
+        points.append(
+            FanoutPoint(
+                shards=shards,
+                quorum=quorum,
+                shard_p99_ms=one.p99_ms,
+                all_p50_ms=wait_all.p50_ms,
+                all_p99_ms=wait_all.p99_ms,
+                all_p999_ms=wait_all.p999_ms,
+                quorum_p99_ms=quorum_p99,
+            )
+        )
+
+        if args.verbose:
+            print(
+                f"shards={shards} shard_p99={one.p99_ms:.2f} all_p50={wait_all.p50_ms:.2f} "
+                f"all_p99={wait_all.p99_ms:.2f} quorum({quorum})_p99={quorum_p99:.2f}"
+            )
+
+    return points
+
+
+def run_shed_sweep(args) -> List[ShedPoint]:
+    rng = random.Random(args.seed)
+    mean_s = args.mean_ms / 1000.0
+    rhos = frange(args.rho_min, args.rho_max, args.rho_step)
+
+    sample_svc, _ = service_sampler(
+        dist=args.dist,
+        mean_s=mean_s,
+        rng=rng,
+        params=dist_params_from_args(args),
+    )
+
+    points: List[ShedPoint] = []
+    for rho in rhos:
+        lam = rho * args.k / mean_s
+
+        lat_s, q_s, s_s = simulate_mgk(
+            k=args.k,
+            n=args.n,
+            lam=lam,
+            sample_service=sample_svc,
+            rng=rng,
+        )
+        base = summarize(
+            lat_s, q_s, s_s,
+            k=args.k,
+            n=args.n,
+            mean_s=mean_s,
+            lam=lam,
+            rho=rho,
+            dist=args.dist,
+        )
+
+        lat_s, q_s, s_s, stats = simulate_events(
+            k=args.k,
+            n=args.n,
+            lam=lam,
+            sample_service=sample_svc,
+            rng=rng,
+            max_queue=args.max_queue,
+            max_inflight=args.max_inflight,
+            codel=args.codel,
+            adaptive_lifo=args.adaptive_lifo,
+            codel_target_s=args.codel_target_ms / 1000.0,
+            codel_interval_s=args.codel_interval_ms / 1000.0,
+        )
+        shed = summarize(
+            lat_s, q_s, s_s,
+            k=args.k,
+            n=args.n,
+            mean_s=mean_s,
+            lam=lam,
+            rho=rho,
+            dist=args.dist,
+            stats=stats,
+        )
+
+        points.append(
+            ShedPoint(
+                rho=rho,
+                base_p99_ms=base.p99_ms,
+                shed_p99_ms=shed.p99_ms,
+                shed_p999_ms=shed.p999_ms,
+                drop_rate=shed.reject_rate + shed.drop_rate,
+                goodput=shed.goodput,
+            )
+        )
+
+        if args.verbose:
+            print(
+                f"rho={rho:.3f} fifo_p99={base.p99_ms:.2f} shed_p99={shed.p99_ms:.2f} "
+                f"drop_rate={points[-1].drop_rate:.4f} goodput={shed.goodput:.1f}"
+            )
+
+    return points
+
+
 def write_csv(path: str, points: List[Point], meta: Dict[str, str]) -> None:
     with open(path, "w", newline="") as f:
         w = csv.writer(f)
         # metadata header (easy to keep provenance)
         for k, v in meta.items():
             w.writerow([f"# {k}={v}"])
-        w.writerow(["rho", "cs", "cs2", "p50_ms", "p95_ms", "p99_ms", "p999_ms", "mean_ms", "mean_queue_ms"])
+        # target_cs2 goes last so readers that index columns keep working
+        w.writerow(["rho", "cs", "cs2", "p50_ms", "p95_ms", "p99_ms", "p999_ms", "mean_ms", "mean_queue_ms", "target_cs2"])
         for p in points:
-            w.writerow([p.rho, p.cs, p.cs2, p.p50_ms, p.p95_ms, p.p99_ms, p.p999_ms, p.mean_ms, p.mean_q_ms])
+            w.writerow([p.rho, p.cs, p.cs2, p.p50_ms, p.p95_ms, p.p99_ms, p.p999_ms, p.mean_ms, p.mean_q_ms, p.target_cs2])
 
 
 def plot_rho(points: List[Point], title: str, out_path: str) -> None:
@@ -355,18 +622,211 @@ def plot_retries(points: List[RetryPoint], title: str, out_path: str) -> None:
     print(f"Wrote plot to {out_path}")
 
 
+def run_autoscale_sweep(args) -> List[AutoscalePoint]:
+    mean_s = args.mean_ms / 1000.0
+    rate, max_rate = piecewise_rate(parse_rate_profile(args.rate_profile))
+    base = autoscale_policy_from_args(args)
+
+    points: List[AutoscalePoint] = []
+    for value in args.param_values:
+        # same seed per point so every policy sees the same traffic
+        rng = random.Random(args.seed)
+        sample_svc, _ = service_sampler(
+            dist=args.dist,
+            mean_s=mean_s,
+            rng=rng,
+            params=dist_params_from_args(args),
+        )
+        policy = replace(base, **{args.autoscale_param: value})
+        st = simulate_autoscale(
+            k=args.k,
+            horizon_s=args.horizon_s,
+            rate=rate,
+            max_rate=max_rate,
+            sample_service=sample_svc,
+            rng=rng,
+            policy=policy,
+            slo_s=args.slo_ms / 1000.0,
+            window_s=args.slo_window_s,
+        )
+        q = st.latency.quantile
+        points.append(
+            AutoscalePoint(
+                value=value,
+                p50_ms=q(0.50) * 1000.0,
+                p99_ms=q(0.99) * 1000.0,
+                p999_ms=q(0.999) * 1000.0,
+                slow_frac=st.slo_violations / max(st.completed, 1),
+                bad_windows=st.slo_bad_windows,
+                windows=st.windows,
+                server_hours=st.server_seconds / 3600.0,
+                peak_servers=st.peak_servers,
+            )
+        )
+
+        if args.verbose:
+            p = points[-1]
+            print(
+                f"{args.autoscale_param}={value:g} p99={p.p99_ms:.2f} slow={p.slow_frac:.4f} "
+                f"bad_windows={p.bad_windows}/{p.windows} server_hours={p.server_hours:.2f}"
+            )
+
+    return points
+
+
+def write_csv_hedge(path: str, points: List[HedgePoint], meta: Dict[str, str]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        for k, v in meta.items():
+            w.writerow([f"# {k}={v}"])
+        w.writerow(["hedge_ms", "p50_ms", "p99_ms", "p999_ms", "utilization", "wasted_frac", "attempts_per_req"])
+        for p in points:
+            w.writerow([p.hedge_ms, p.p50_ms, p.p99_ms, p.p999_ms, p.utilization, p.wasted_frac, p.attempts_per_req])
+
+
+def plot_hedge(points: List[HedgePoint], title: str, out_path: str) -> None:
+    base = points[0]
+    hedged = points[1:]
+    xs = [p.hedge_ms for p in hedged]
+
+    fig, (ax_lat, ax_load) = plt.subplots(2, 1, sharex=True, figsize=(6.4, 6.4))
+    ax_lat.plot(xs, [p.p99_ms for p in hedged], label="p99 (hedged)")
+    ax_lat.plot(xs, [p.p999_ms for p in hedged], label="p99.9 (hedged)")
+    ax_lat.axhline(base.p99_ms, linestyle="--", color="C0", label="p99 (no hedging)")
+    ax_lat.axhline(base.p999_ms, linestyle="--", color="C1", label="p99.9 (no hedging)")
+    ax_lat.set_ylabel("latency (ms)")
+    ax_lat.set_title(title)
+    ax_lat.grid(True)
+    ax_lat.legend()
+
+    ax_load.plot(xs, [p.attempts_per_req for p in hedged], label="attempts per request")
+    ax_load.plot(xs, [p.utilization for p in hedged], label="observed utilization")
+    ax_load.axhline(base.utilization, linestyle="--", color="C1", label="utilization (no hedging)")
+    ax_load.set_xlabel("hedge delay (ms)")
+    ax_load.grid(True)
+    ax_load.legend()
+
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=160)
+    print(f"Wrote plot to {out_path}")
+
+
+def write_csv_shards(path: str, points: List[FanoutPoint], meta: Dict[str, str]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        for k, v in meta.items():
+            w.writerow([f"# {k}={v}"])
+        w.writerow(["shards", "quorum", "shard_p99_ms", "all_p50_ms", "all_p99_ms", "all_p999_ms", "quorum_p99_ms"])
+        for p in points:
+            w.writerow([p.shards, p.quorum, p.shard_p99_ms, p.all_p50_ms, p.all_p99_ms, p.all_p999_ms, p.quorum_p99_ms])
+
+
+def plot_shards(points: List[FanoutPoint], title: str, out_path: str, quorum_frac: Optional[float]) -> None:
+    xs = [p.shards for p in points]
+
+    plt.figure()
+    plt.plot(xs, [p.shard_p99_ms for p in points], label="p99 (one shard)")
+    plt.plot(xs, [p.all_p50_ms for p in points], label="p50 (wait for all)")
+    plt.plot(xs, [p.all_p99_ms for p in points], label="p99 (wait for all)")
+    if quorum_frac is not None:
+        plt.plot(xs, [p.quorum_p99_ms for p in points], label=f"p99 (wait for {quorum_frac:.0%})")
+    plt.xlabel("fan-out width N (shards)")
+    plt.ylabel("latency (ms)")
+    plt.title(title)
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=160)
+    print(f"Wrote plot to {out_path}")
+
+
+def write_csv_shed(path: str, points: List[ShedPoint], meta: Dict[str, str]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        for k, v in meta.items():
+            w.writerow([f"# {k}={v}"])
+        w.writerow(["rho", "base_p99_ms", "shed_p99_ms", "shed_p999_ms", "drop_rate", "goodput"])
+        for p in points:
+            w.writerow([p.rho, p.base_p99_ms, p.shed_p99_ms, p.shed_p999_ms, p.drop_rate, p.goodput])
+
+
+def plot_shed(points: List[ShedPoint], title: str, out_path: str) -> None:
+    xs = [p.rho for p in points]
+
+    fig, (ax_lat, ax_drop) = plt.subplots(2, 1, sharex=True, figsize=(6.4, 6.4))
+    ax_lat.plot(xs, [p.base_p99_ms for p in points], label="p99 (unbounded FIFO)")
+    ax_lat.plot(xs, [p.shed_p99_ms for p in points], label="p99 (with limits)")
+    ax_lat.plot(xs, [p.shed_p999_ms for p in points], label="p99.9 (with limits)")
+    ax_lat.set_ylabel("latency (ms)")
+    ax_lat.set_yscale("log")
+    ax_lat.set_title(title)
+    ax_lat.grid(True)
+    ax_lat.legend()
+
+    ax_drop.plot(xs, [p.drop_rate for p in points], label="drop + reject rate")
+    ax_drop.set_xlabel("offered utilization ρ")
+    ax_drop.set_ylabel("fraction of attempts")
+    ax_drop.grid(True)
+    ax_drop.legend()
+
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=160)
+    print(f"Wrote plot to {out_path}")
+
+
+def write_csv_autoscale(path: str, points: List[AutoscalePoint], param: str, meta: Dict[str, str]) -> None:
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        for k, v in meta.items():
+            w.writerow([f"# {k}={v}"])
+        w.writerow([param, "p50_ms", "p99_ms", "p999_ms", "slow_frac", "bad_windows", "windows",
+                    "server_hours", "peak_servers"])
+        for p in points:
+            w.writerow([p.value, p.p50_ms, p.p99_ms, p.p999_ms, p.slow_frac, p.bad_windows, p.windows,
+                        p.server_hours, p.peak_servers])
+
+
+def plot_autoscale(points: List[AutoscalePoint], param: str, slo_ms: float, title: str, out_path: str) -> None:
+    xs = [p.value for p in points]
+
+    fig, (ax_lat, ax_cost) = plt.subplots(2, 1, sharex=True, figsize=(6.4, 6.4))
+    ax_lat.plot(xs, [p.p99_ms for p in points], marker="o", label="p99")
+    ax_lat.plot(xs, [p.p999_ms for p in points], marker="o", label="p99.9")
+    ax_lat.axhline(slo_ms, linestyle="--", color="C3", label=f"SLO {slo_ms:g} ms")
+    ax_lat.set_ylabel("latency (ms)")
+    ax_lat.set_yscale("log")
+    ax_lat.set_title(title)
+    ax_lat.grid(True)
+    ax_lat.legend()
+
+    ax_cost.plot(xs, [p.server_hours for p in points], marker="o", color="C2", label="server-hours")
+    ax_cost.set_xlabel(param)
+    ax_cost.set_ylabel("server-hours")
+    ax_cost.grid(True)
+    ax_bad = ax_cost.twinx()
+    ax_bad.plot(xs, [p.bad_windows / max(p.windows, 1) for p in points], marker="s", color="C3",
+                label="windows with p99 > SLO")
+    ax_bad.set_ylabel("fraction of windows")
+    lines = ax_cost.get_lines() + ax_bad.get_lines()
+    ax_cost.legend(lines, [l.get_label() for l in lines])
+
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=160)
+    print(f"Wrote plot to {out_path}")
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--k", type=int, default=1)
     ap.add_argument("--n", type=int, default=200_000)
     ap.add_argument("--mean-ms", type=float, default=10.0)
 
-    ap.add_argument("--sweep", type=str, default="rho", choices=["rho", "cs", "retries"])
+    ap.add_argument("--sweep", type=str, default="rho", choices=["rho", "cs", "retries", "hedge", "shards", "shed", "autoscale"])
 
     ap.add_argument("--rho-min", type=float, default=0.20)
     ap.add_argument("--rho-max", type=float, default=0.95)
     ap.add_argument("--rho-step", type=float, default=0.05)
-    ap.add_argument("--rho", type=float, default=0.70, help="fixed rho for --sweep cs2")
+    ap.add_argument("--rho", type=float, default=0.70, help="fixed rho for --sweep cs, hedge and shards")
 
     ap.add_argument("--cs-min", type=float, default=0.5)
     ap.add_argument("--cs-max", type=float, default=2.0)
@@ -374,12 +834,30 @@ def main() -> None:
 
     ap.add_argument("--retry-p", type=float, default=0.1)
 
-    ap.add_argument("--dist", type=str, default="mixture",
-                    choices=["const", "exp", "lognormal", "mixture"])
+    ap.add_argument("--hedge-min-ms", type=float, default=5.0)
+    ap.add_argument("--hedge-max-ms", type=float, default=50.0)
+    ap.add_argument("--hedge-step-ms", type=float, default=5.0)
 
-    ap.add_argument("--lognorm-sigma", type=float, default=1.2)
-    ap.add_argument("--mix-p", type=float, default=0.01)
-    ap.add_argument("--slow-mult", type=float, default=100.0)
+    ap.add_argument("--shards-min", type=int, default=1)
+    ap.add_argument("--shards-max", type=int, default=100)
+    ap.add_argument("--shards-step", type=int, default=9)
+    ap.add_argument("--quorum-frac", type=float, default=None,
+                    help="also plot waiting for this fraction of shards (rounded up)")
+
+    ap.add_argument("--max-queue", type=int, default=None)
+    ap.add_argument("--max-inflight", type=int, default=None)
+    ap.add_argument("--codel", action="store_true")
+    ap.add_argument("--codel-target-ms", type=float, default=5.0)
+    ap.add_argument("--codel-interval-ms", type=float, default=100.0)
+    ap.add_argument("--adaptive-lifo", action="store_true")
+
+    add_autoscale_args(ap)
+    ap.add_argument("--autoscale-param", type=str, default="up_delay_s",
+                    choices=["target_util", "eval_s", "up_delay_s", "cooldown_s"])
+    ap.add_argument("--param-values", type=str, default="0,30,60,120,240,480",
+                    help="comma-separated values of --autoscale-param")
+
+    add_distribution_args(ap, default="mixture", lognorm_sigma=1.2)
 
     ap.add_argument("--out", type=str, default="sweep.png")
     ap.add_argument("--csv", type=str, default="sweep.csv")
@@ -388,11 +866,21 @@ def main() -> None:
 
     args = ap.parse_args()
 
-    if args.sweep == "rho":
+    if args.sweep in ("rho", "shed"):
         if not (0.0 < args.rho_min < 1.0 and 0.0 < args.rho_max < 1.0 and args.rho_min < args.rho_max):
             raise SystemExit("rho range must satisfy 0 < rho-min < rho-max < 1")
         if args.rho_step <= 0:
             raise SystemExit("rho-step must be > 0")
+        if args.sweep == "shed" and not (
+            args.max_queue is not None or args.max_inflight is not None or args.codel or args.adaptive_lifo
+        ):
+            raise SystemExit("--sweep shed needs --max-queue, --max-inflight, --codel or --adaptive-lifo")
+        if args.max_queue is not None and args.max_queue < 0:
+            raise SystemExit("--max-queue must be >= 0")
+        if args.max_inflight is not None and args.max_inflight <= 0:
+            raise SystemExit("--max-inflight must be >= 1")
+        if args.codel_target_ms <= 0 or args.codel_interval_ms <= 0:
+            raise SystemExit("--codel-target-ms and --codel-interval-ms must be > 0")
     elif args.sweep == "cs":
         if not (0.0 < args.rho < 1.0):
             raise SystemExit("--rho must be in (0,1) for --sweep cs")
@@ -400,6 +888,48 @@ def main() -> None:
             raise SystemExit("cs range must satisfy 0 <= cs-min < cs-max")
         if args.cs_step <= 0:
             raise SystemExit("cs-step must be > 0")
+    elif args.sweep == "hedge":
+        if not (0.0 < args.rho < 1.0):
+            raise SystemExit("--rho must be in (0,1) for --sweep hedge")
+        if not (args.hedge_min_ms >= 0.0 and args.hedge_max_ms >= args.hedge_min_ms):
+            raise SystemExit("hedge range must satisfy 0 <= hedge-min-ms <= hedge-max-ms")
+        if args.hedge_step_ms <= 0:
+            raise SystemExit("hedge-step-ms must be > 0")
+    elif args.sweep == "shards":
+        if not (0.0 < args.rho < 1.0):
+            raise SystemExit("--rho must be in (0,1) for --sweep shards")
+        if not (1 <= args.shards_min <= args.shards_max):
+            raise SystemExit("shards range must satisfy 1 <= shards-min <= shards-max")
+        if args.shards_step <= 0:
+            raise SystemExit("shards-step must be > 0")
+        if args.quorum_frac is not None and not (0.0 < args.quorum_frac <= 1.0):
+            raise SystemExit("--quorum-frac must be in (0,1]")
+    elif args.sweep == "autoscale":
+        if args.rate_profile is None:
+            raise SystemExit("--sweep autoscale needs --rate-profile")
+        try:
+            piecewise_rate(parse_rate_profile(args.rate_profile))
+        except ValueError as e:
+            raise SystemExit(f"--rate-profile: {e}")
+        try:
+            args.param_values = [float(v) for v in args.param_values.split(",")]
+        except ValueError as e:
+            raise SystemExit(f"--param-values: {e}")
+        if not (1 <= args.min_k <= args.k <= args.max_k):
+            raise SystemExit("need 1 <= --min-k <= --k <= --max-k")
+        if not (0.0 < args.target_util <= 1.0):
+            raise SystemExit("--target-util must be in (0,1]")
+        if args.eval_s <= 0 or args.up_delay_s < 0 or args.cooldown_s < 0:
+            raise SystemExit("--eval-s must be > 0, --up-delay-s and --cooldown-s >= 0")
+        for v in args.param_values:
+            if args.autoscale_param == "target_util" and not (0.0 < v <= 1.0):
+                raise SystemExit(f"--param-values: target_util={v:g} must be in (0,1]")
+            if args.autoscale_param == "eval_s" and not v > 0:
+                raise SystemExit(f"--param-values: eval_s={v:g} must be > 0")
+            if not v >= 0:
+                raise SystemExit(f"--param-values: {args.autoscale_param}={v:g} must be >= 0")
+        if args.horizon_s <= 0 or args.slo_window_s <= 0:
+            raise SystemExit("--horizon-s and --slo-window-s must be > 0")
     else:
         if not (0.0 <= args.retry_p < 1.0):
             raise SystemExit("--retry-p must be in [0,1)")
@@ -418,6 +948,14 @@ def main() -> None:
         points = run_rho_sweep(args)
     elif args.sweep == "cs":
         points = run_cs_sweep(args)
+    elif args.sweep == "hedge":
+        points = run_hedge_sweep(args)
+    elif args.sweep == "shards":
+        points = run_shards_sweep(args)
+    elif args.sweep == "shed":
+        points = run_shed_sweep(args)
+    elif args.sweep == "autoscale":
+        points = run_autoscale_sweep(args)
     else:
         points = run_retries_sweep(args)
 
@@ -435,10 +973,39 @@ def main() -> None:
         "cs_max": str(args.cs_max),
         "cs_step": str(args.cs_step),
         "retry_p": str(args.retry_p),
+        "hedge_min_ms": str(args.hedge_min_ms),
+        "hedge_max_ms": str(args.hedge_max_ms),
+        "hedge_step_ms": str(args.hedge_step_ms),
+        "shards_min": str(args.shards_min),
+        "shards_max": str(args.shards_max),
+        "shards_step": str(args.shards_step),
+        "quorum_frac": str(args.quorum_frac),
+        "max_queue": str(args.max_queue),
+        "max_inflight": str(args.max_inflight),
+        "codel": str(args.codel),
+        "codel_target_ms": str(args.codel_target_ms),
+        "codel_interval_ms": str(args.codel_interval_ms),
+        "adaptive_lifo": str(args.adaptive_lifo),
+        "rate_profile": str(args.rate_profile),
+        "horizon_s": str(args.horizon_s),
+        "target_util": str(args.target_util),
+        "eval_s": str(args.eval_s),
+        "up_delay_s": str(args.up_delay_s),
+        "cooldown_s": str(args.cooldown_s),
+        "min_k": str(args.min_k),
+        "max_k": str(args.max_k),
+        "slo_ms": str(args.slo_ms),
+        "autoscale_param": args.autoscale_param,
+        "param_values": str(args.param_values),
+        "slo_window_s": str(args.slo_window_s),
         "seed": str(args.seed),
         "lognorm_sigma": str(args.lognorm_sigma),
         "mix_p": str(args.mix_p),
         "slow_mult": str(args.slow_mult),
+        "pareto_alpha": str(args.pareto_alpha),
+        "weibull_shape": str(args.weibull_shape),
+        "gamma_shape": str(args.gamma_shape),
+        "h2_cs2": str(args.h2_cs2),
     }
 
     if args.sweep == "rho":
@@ -449,6 +1016,22 @@ def main() -> None:
         write_csv(args.csv, points, meta)
         title = f"Sweep C_s (M/G/{args.k}), rho={args.rho:.2f}, dist={args.dist}, E[S]={args.mean_ms:.1f}ms, n={args.n:,}"
         plot_cs(points, title, args.out)
+    elif args.sweep == "hedge":
+        write_csv_hedge(args.csv, points, meta)
+        title = f"Hedging (M/G/{args.k}), rho={args.rho:.2f}, dist={args.dist}, E[S]={args.mean_ms:.1f}ms, n={args.n:,}"
+        plot_hedge(points, title, args.out)
+    elif args.sweep == "shards":
+        write_csv_shards(args.csv, points, meta)
+        title = f"Fan-out (M/G/{args.k} shards), rho={args.rho:.2f}, dist={args.dist}, E[S]={args.mean_ms:.1f}ms, n={args.n:,}"
+        plot_shards(points, title, args.out, args.quorum_frac)
+    elif args.sweep == "shed":
+        write_csv_shed(args.csv, points, meta)
+        title = f"Load shedding (M/G/{args.k}), dist={args.dist}, E[S]={args.mean_ms:.1f}ms, n={args.n:,}"
+        plot_shed(points, title, args.out)
+    elif args.sweep == "autoscale":
+        write_csv_autoscale(args.csv, points, args.autoscale_param, meta)
+        title = f"Autoscaling vs {args.autoscale_param}, dist={args.dist}, E[S]={args.mean_ms:.1f}ms, SLO={args.slo_ms:g}ms"
+        plot_autoscale(points, args.autoscale_param, args.slo_ms, title, args.out)
     else:
         write_csv_retries(args.csv, points, meta)
         title = f"Retries vs ρ (M/G/{args.k}), retry_p={args.retry_p:.2f}, E[S]={args.mean_ms:.1f}ms, n={args.n:,}"